@@ -0,0 +1,434 @@
+# bench.py
+# Benchmark every route in main.py against deterministic synthetic inputs.
+#
+#   python bench.py                                # in-process, via FastAPI's TestClient
+#   python bench.py --url http://localhost:8000 --pid <uvicorn pid>
+#   python bench.py --sizes small,large --only pdf-to-jpg,ocr --output bench.json
+#   python bench.py --baseline old.json            # exit 1 if any p50 regressed
+#
+# For every endpoint and input size it reports latency percentiles, throughput,
+# peak RSS of the server process tree and peak/leftover temp-disk usage, and writes
+# the numbers as JSON so runs can be compared. Async job cases ("job-*") are timed end to
+# end: POST /jobs/{operation}, poll GET /jobs/{id} until it finishes, GET the download. Needs httpx (for TestClient / --url);
+# temp-disk and RSS sampling assume the server runs on this Linux host.
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageDraw
+
+# pages per synthetic document; scanned inputs are kept shorter because OCR is slow
+SIZES = {
+    "small": {"pages": 3, "scanned_pages": 1, "images": 2, "merge_files": 3},
+    "medium": {"pages": 30, "scanned_pages": 5, "images": 10, "merge_files": 20},
+    "large": {"pages": 300, "scanned_pages": 20, "images": 50, "merge_files": 100},
+}
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud").split()
+
+# --- Synthetic corpus ---
+def _sentence(rng: random.Random, n: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+def text_pdf(pages: int, seed: int = 1) -> bytes:
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 60), f"Page {i + 1}", fontsize=16)
+        y = 90
+        while y < page.rect.height - 60:
+            page.insert_text((72, y), _sentence(rng), fontsize=10)
+            y += 14
+    doc.set_toc([[1, f"Section {i + 1}", i + 1] for i in range(0, pages, max(1, pages // 5))])
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def table_pdf(pages: int, seed: int = 2) -> bytes:
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 60), f"Report page {i + 1}", fontsize=14)
+        if i % 3 == 2:
+            # every third page is plain prose, so table detection has something to skip
+            page.insert_text((72, 100), _sentence(rng, 20), fontsize=10)
+            continue
+        rows, cols, x0, y0, w, h = 12, 5, 72, 90, 90, 20
+        for r in range(rows + 1):
+            page.draw_line((x0, y0 + r * h), (x0 + cols * w, y0 + r * h))
+        for c in range(cols + 1):
+            page.draw_line((x0 + c * w, y0), (x0 + c * w, y0 + rows * h))
+        for r in range(rows):
+            for c in range(cols):
+                text = f"H{c + 1}" if r == 0 else str(rng.randint(0, 99999))
+                page.insert_text((x0 + c * w + 4, y0 + r * h + 14), text, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def _scan_image(rng: random.Random, page_no: int) -> Image.Image:
+    img = Image.new("L", (1275, 1650), 255)  # US letter at 150 dpi
+    draw = ImageDraw.Draw(img)
+    draw.text((100, 80), f"Scanned page {page_no}", fill=0)
+    for y in range(140, 1550, 28):
+        draw.text((100, y), _sentence(rng, 10), fill=0)
+    return img
+
+def scanned_pdf(pages: int, seed: int = 3) -> bytes:
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for i in range(pages):
+        buf = io.BytesIO()
+        _scan_image(rng, i + 1).save(buf, format="JPEG", quality=80)
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=buf.getvalue())
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def protected_pdf(pages: int) -> bytes:
+    doc = fitz.open(stream=text_pdf(pages), filetype="pdf")
+    data = doc.tobytes(encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw="bench", user_pw="bench")
+    doc.close()
+    return data
+
+def jpg(seed: int) -> bytes:
+    rng = random.Random(seed)
+    img = Image.new("RGB", (1600, 1200), (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x, y = rng.randint(0, 1500), rng.randint(0, 1100)
+        draw.rectangle((x, y, x + 100, y + 100), fill=(rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+def docx(paragraphs: int, seed: int = 4) -> bytes:
+    # a minimal WordprocessingML package, so the benchmark needs no python-docx
+    rng = random.Random(seed)
+    body = "".join(f"<w:p><w:r><w:t>{_sentence(rng, 30)}</w:t></w:r></w:p>" for _ in range(paragraphs))
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml",
+                    '<?xml version="1.0" encoding="UTF-8"?>'
+                    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                    '<Default Extension="xml" ContentType="application/xml"/>'
+                    '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+                    '</Types>')
+        zf.writestr("_rels/.rels",
+                    '<?xml version="1.0" encoding="UTF-8"?>'
+                    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+                    '</Relationships>')
+        zf.writestr("word/document.xml",
+                    '<?xml version="1.0" encoding="UTF-8"?>'
+                    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                    f'<w:body>{body}</w:body></w:document>')
+    return buf.getvalue()
+
+def xlsx(rows: int, seed: int = 5) -> bytes:
+    from openpyxl import Workbook
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("data")
+    ws.append([f"col{c}" for c in range(8)])
+    for _ in range(rows):
+        ws.append([rng.randint(0, 10000) for _ in range(8)])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+def pptx(slides: int, seed: int = 6) -> bytes:
+    from pptx import Presentation
+    from pptx.util import Inches
+    rng = random.Random(seed)
+    prs = Presentation()
+    for i in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[5])
+        slide.shapes.title.text = f"Slide {i + 1}"
+        box = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(8), Inches(4))
+        box.text_frame.text = _sentence(rng, 40)
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
+
+def build_corpus(size: str) -> dict:
+    cfg = SIZES[size]
+    pages = cfg["pages"]
+    text = text_pdf(pages)
+    return {
+        "text_pdf": text,
+        "table_pdf": table_pdf(pages),
+        "scanned_pdf": scanned_pdf(cfg["scanned_pages"]),
+        "protected_pdf": protected_pdf(pages),
+        "merge_pdfs": [text_pdf(max(1, pages // 10), seed=100 + i) for i in range(cfg["merge_files"])],
+        "jpgs": [jpg(200 + i) for i in range(cfg["images"])],
+        "docx": docx(pages * 10),
+        "xlsx": xlsx(pages * 40),
+        "pptx": pptx(pages),
+        "html": "<html><body>" + "".join(f"<p>{_sentence(random.Random(i), 30)}</p>" for i in range(pages * 20)) + "</body></html>",
+        "pages": pages,
+    }
+
+# --- Endpoints ---
+PDF = "application/pdf"
+JOB_POLL_INTERVAL = 0.05
+
+def endpoints(corpus: dict) -> list:
+    # (name, method, path, files, form data); method "JOB" submits to the async job API
+    pages = corpus["pages"]
+    text = ("file", ("doc.pdf", corpus["text_pdf"], PDF))
+    tables = ("file", ("tables.pdf", corpus["table_pdf"], PDF))
+    scan = ("file", ("scan.pdf", corpus["scanned_pdf"], PDF))
+    last = min(pages, 3)
+    return [
+        ("root", "GET", "/", None, None),
+        ("ping", "GET", "/ping", None, None),
+        ("pdf-to-word", "POST", "/convert/pdf-to-word", [text], None),
+        ("word-to-pdf", "POST", "/convert/word-to-pdf", [("file", ("doc.docx", corpus["docx"], "application/vnd.openxmlformats-officedocument.wordprocessingml.document"))], None),
+        ("pdf-to-jpg", "POST", "/convert/pdf-to-jpg", [text], None),
+        ("pdf-to-jpg-thumbnail", "POST", "/convert/pdf-to-jpg", [text], {"thumbnail": "true"}),
+        ("jpg-to-pdf", "POST", "/convert/jpg-to-pdf", [("files", (f"img{i}.jpg", data, "image/jpeg")) for i, data in enumerate(corpus["jpgs"])], None),
+        ("pdf-to-excel", "POST", "/convert/pdf-to-excel", [tables], None),
+        ("excel-to-pdf", "POST", "/convert/excel-to-pdf", [("file", ("book.xlsx", corpus["xlsx"], "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"))], None),
+        ("merge", "POST", "/tools/merge", [("files", (f"part{i}.pdf", data, PDF)) for i, data in enumerate(corpus["merge_pdfs"])], None),
+        ("split", "POST", "/tools/split", [text], None),
+        ("extract", "POST", "/tools/extract", [text], {"pages": f"1-{last}"}),
+        ("delete-pages", "POST", "/tools/delete-pages", [text], {"pages": "1"}),
+        ("reorder", "POST", "/tools/reorder", [text], {"order": ",".join(str(p) for p in range(pages, 0, -1))}),
+        ("rotate", "POST", "/tools/rotate", [text], {"page": "1", "degrees": "90"}),
+        ("watermark-text", "POST", "/tools/watermark-text", [text], {"text": "CONFIDENTIAL"}),
+        ("add-page-numbers", "POST", "/tools/add-page-numbers", [text], None),
+        ("add-text", "POST", "/tools/edit/add-text", [text], {"page": "1", "x": "100", "y": "100", "text": "hello"}),
+        ("pipeline", "POST", "/tools/pipeline", [text], {"operations": json.dumps([
+            {"op": "rotate", "page": 1, "degrees": 90},
+            {"op": "watermark-text", "text": "CONFIDENTIAL"},
+            {"op": "add-page-numbers"},
+        ])}),
+        ("protect", "POST", "/tools/protect", [text], {"password": "bench"}),
+        ("unlock", "POST", "/tools/unlock", [("file", ("locked.pdf", corpus["protected_pdf"], PDF))], {"password": "bench"}),
+        ("repair", "POST", "/tools/repair", [text], None),
+        ("pdfa", "POST", "/tools/pdfa", [text], None),
+        ("ocr", "POST", "/tools/ocr", [scan], None),
+        ("html-to-pdf", "POST", "/convert/html-to-pdf", None, {"html": corpus["html"]}),
+        ("pdf-to-ppt", "POST", "/convert/pdf-to-ppt", [text], None),
+        ("pdf-to-ppt-native", "POST", "/convert/pdf-to-ppt", [text], {"mode": "native"}),
+        ("ppt-to-pdf", "POST", "/convert/ppt-to-pdf", [("file", ("deck.pptx", corpus["pptx"], "application/vnd.openxmlformats-officedocument.presentationml.presentation"))], None),
+        ("job-pdf-to-word", "JOB", "/jobs/pdf-to-word", [text], None),
+        ("job-pdf-to-excel", "JOB", "/jobs/pdf-to-excel", [tables], None),
+        ("job-ocr", "JOB", "/jobs/ocr", [scan], None),
+        ("job-pdf-to-ppt", "JOB", "/jobs/pdf-to-ppt", [text], None),
+        ("job-merge", "JOB", "/jobs/merge", [("files", (f"part{i}.pdf", data, PDF)) for i, data in enumerate(corpus["merge_pdfs"])], None),
+        ("metrics", "GET", "/metrics", None, None),
+        ("cache-stats", "GET", "/cache/stats", None, None),
+    ]
+
+# --- Resource sampling ---
+def _children(pid: int) -> list:
+    kids = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                kids += [int(c) for c in f.read().split()]
+    except OSError:
+        pass
+    return kids
+
+def tree_rss(pid: int) -> int:
+    # resident memory of pid and all its descendants (render pool, soffice, ...), in bytes
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+        stack += _children(p)
+    return total
+
+def dir_bytes(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+class Sampler:
+    def __init__(self, pid: int, tmp_dir: str, interval: float = 0.05):
+        self.pid, self.tmp_dir, self.interval = pid, tmp_dir, interval
+        self.peak_rss = self.peak_tmp = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        if self.pid:
+            self.peak_rss = max(self.peak_rss, tree_rss(self.pid))
+        self.peak_tmp = max(self.peak_tmp, dir_bytes(self.tmp_dir))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+# --- Runner ---
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+def run_job(client, path: str, files, data):
+    # submit -> poll until done or failed -> download; returns the last response
+    r = client.post(path, files=files, data=data)
+    if r.status_code >= 400:
+        return r
+    status_url = r.json()["status_url"]
+    while r.json()["status"] not in ("done", "failed"):
+        time.sleep(JOB_POLL_INTERVAL)
+        r = client.get(status_url)
+        if r.status_code >= 400:
+            return r
+    return client.get(f"{status_url}/download")
+
+def run_endpoint(client, spec, iterations: int, warmup: int, pid: int, tmp_dir: str) -> dict:
+    name, method, path, files, data = spec
+    latencies, errors, status, out_bytes = [], 0, None, 0
+
+    def call():
+        if method == "GET":
+            return client.get(path)
+        if method == "JOB":
+            return run_job(client, path, files, data)
+        return client.post(path, files=files, data=data)
+
+    for _ in range(warmup):
+        call()
+    tmp_before = dir_bytes(tmp_dir)
+    with Sampler(pid, tmp_dir) as sampler:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            r = call()
+            latencies.append(time.perf_counter() - t0)
+            status = r.status_code
+            out_bytes = len(r.content)
+            if r.status_code >= 400:
+                errors += 1
+        elapsed = time.perf_counter() - started
+    return {
+        "endpoint": name,
+        "iterations": iterations,
+        "errors": errors,
+        "last_status": status,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p90_ms": percentile(latencies, 0.90) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "throughput_rps": iterations / elapsed if elapsed else 0.0,
+        "response_bytes": out_bytes,
+        "peak_rss_bytes": sampler.peak_rss or None,
+        "peak_tmp_bytes": max(0, sampler.peak_tmp - tmp_before),
+        "leftover_tmp_bytes": max(0, dir_bytes(tmp_dir) - tmp_before),
+    }
+
+def compare(results: list, baseline_path: str, tolerance: float) -> list:
+    with open(baseline_path) as f:
+        baseline = {(r["size"], r["endpoint"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get((r["size"], r["endpoint"]))
+        if old and old["errors"] == 0 and r["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+            regressions.append(f'{r["size"]}/{r["endpoint"]}: p50 {old["p50_ms"]:.1f} -> {r["p50_ms"]:.1f} ms')
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the PDF Tools API endpoints")
+    parser.add_argument("--url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--pid", type=int, help="server pid for RSS sampling in --url mode")
+    parser.add_argument("--sizes", default="small,medium", help=f"comma-separated, from {','.join(SIZES)}")
+    parser.add_argument("--only", help="comma-separated endpoint names to run")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--with-cache", action="store_true", help="leave the result cache on (it is disabled by default)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results JSON; exit 1 if any p50 regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown against --baseline")
+    args = parser.parse_args(argv)
+
+    tmp_dir = tempfile.gettempdir()
+    if args.url:
+        import httpx
+        client = httpx.Client(base_url=args.url, timeout=None)
+        pid = args.pid
+    else:
+        if not args.with_cache:
+            os.environ["CACHE_MAX_BYTES"] = "0"
+        from fastapi.testclient import TestClient
+        import main as app_module
+        client = TestClient(app_module.app)
+        client.__enter__()  # run startup handlers (job workers) for the whole session
+        pid = os.getpid()
+
+    only = set(args.only.split(",")) if args.only else None
+    results = []
+    try:
+        for size in args.sizes.split(","):
+            corpus = build_corpus(size)
+            for spec in endpoints(corpus):
+                if only and spec[0] not in only:
+                    continue
+                r = run_endpoint(client, spec, args.iterations, args.warmup, pid, tmp_dir)
+                r["size"] = size
+                results.append(r)
+                rss = f'{r["peak_rss_bytes"] / 2**20:8.1f}' if r["peak_rss_bytes"] else "       -"
+                print(f'{size:6} {r["endpoint"]:17} p50 {r["p50_ms"]:9.1f} ms  p99 {r["p99_ms"]:9.1f} ms  '
+                      f'{r["throughput_rps"]:7.2f} rps  rss {rss} MiB  tmp {r["peak_tmp_bytes"] / 2**20:7.1f} MiB  '
+                      f'errors {r["errors"]}', flush=True)
+    finally:
+        if args.url:
+            client.close()
+        else:
+            client.__exit__(None, None, None)
+
+    with open(args.output, "w") as f:
+        json.dump({"created_at": time.time(), "python": sys.version, "results": results}, f, indent=2)
+    print(f"wrote {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
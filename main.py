@@ -2,16 +2,46 @@
 import shutil
 import subprocess
 import tempfile
+import select
+import threading
+import time
+import asyncio
+import contextlib
+import contextvars
+import copy
+import bisect
+import collections
+import hashlib
+import json
+import math
+import re
+from xml.sax.saxutils import escape, quoteattr
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
 from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
-from typing import List, Optional
+from fastapi.responses import StreamingResponse, JSONResponse, Response, FileResponse
+from starlette.background import BackgroundTask
+from starlette.routing import Match
+from typing import Iterable, List, Optional
 from pydantic import BaseModel
 import os
 import uuid
 import fitz  # PyMuPDF
 from pdf2image import convert_from_path
 from pdf2docx import Converter
+from docx import Document as DocxDocument
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml import OxmlElement
+from docx.oxml.ns import nsmap, qn
 import camelot
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
 import pytesseract
 from PIL import Image
 import io
@@ -19,36 +49,1208 @@ import pandas as pd
 
 app = FastAPI(title="PDF Tools API")
 
+# --- Metrics ---
+# Prometheus text exposition at GET /metrics, kept in-process (no client library).
+# Per route: request/error counts, latency histogram, bytes in/out and pages processed.
+# Per stage (upload, open, convert, encode, response): where a request spends its time,
+# with the conversion engine as a label. Route labels use the route template, so
+# "/jobs/{job_id}" is one series rather than one per job.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = collections.defaultdict(float)  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self._help = {}
+
+    def describe(self, name: str, kind: str, text: str):
+        self._help[name] = (kind, text)
+
+    def inc(self, name: str, labels: dict, value: float = 1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name: str, labels: dict, value: float):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    h[i] += 1
+            h[-2] += value
+            h[-1] += 1
+
+    @staticmethod
+    def _labels(labels, extra=()) -> str:
+        items = list(labels) + list(extra)
+        if not items:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+    def render(self, gauges: dict = None) -> str:
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, list(v)) for k, v in self._histograms.items())
+        seen = set()
+
+        def header(name, default_kind):
+            if name not in seen:
+                seen.add(name)
+                kind, text = self._help.get(name, (default_kind, name))
+                lines.append(f"# HELP {name} {text}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{name}{self._labels(labels)} {value:g}")
+        for (name, labels), h in histograms:
+            header(name, "histogram")
+            for bound, count in zip(LATENCY_BUCKETS, h):
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', f'{bound:g}')])} {count}")
+            lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {h[-1]}")
+            lines.append(f"{name}_sum{self._labels(labels)} {h[-2]:g}")
+            lines.append(f"{name}_count{self._labels(labels)} {h[-1]}")
+        for name, value in (gauges or {}).items():
+            header(name, "gauge")
+            lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+metrics.describe("pdf_tools_requests_total", "counter", "HTTP requests by route, method and status")
+metrics.describe("pdf_tools_request_errors_total", "counter", "HTTP requests answered with status >= 400")
+metrics.describe("pdf_tools_request_duration_seconds", "histogram", "Time from request start until the last response byte")
+metrics.describe("pdf_tools_request_bytes_total", "counter", "Request body bytes received")
+metrics.describe("pdf_tools_response_bytes_total", "counter", "Response body bytes sent")
+metrics.describe("pdf_tools_pages_total", "counter", "PDF pages processed")
+metrics.describe("pdf_tools_stage_seconds", "histogram", "Time spent per processing stage")
+
+_current_route = contextvars.ContextVar("current_route", default="other")
+
+@contextlib.contextmanager
+def stage(name: str, engine: str = ""):
+    # Time a block of a request; use around awaits or inside "fitz"/"subprocess" pool calls
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        labels = {"route": _current_route.get(), "stage": name}
+        if engine:
+            labels["engine"] = engine
+        metrics.observe("pdf_tools_stage_seconds", labels, time.perf_counter() - started)
+
+def record_pages(count: int):
+    metrics.inc("pdf_tools_pages_total", {"route": _current_route.get()}, count)
+
+def _route_template(scope) -> str:
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "other")
+    return "other"
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = _route_template(scope)
+        token = _current_route.set(route)
+        labels = {"route": route, "method": scope["method"]}
+        state = {"status": 500, "bytes_in": 0, "bytes_out": 0, "response_started": None}
+
+        async def counting_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["bytes_in"] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["response_started"] = time.perf_counter()
+            elif message["type"] == "http.response.body":
+                state["bytes_out"] += len(message.get("body", b""))
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            finished = time.perf_counter()
+            status = state["status"]
+            metrics.inc("pdf_tools_requests_total", dict(labels, status=str(status)))
+            if status >= 400:
+                metrics.inc("pdf_tools_request_errors_total", labels)
+            metrics.observe("pdf_tools_request_duration_seconds", labels, finished - started)
+            metrics.inc("pdf_tools_request_bytes_total", labels, state["bytes_in"])
+            metrics.inc("pdf_tools_response_bytes_total", labels, state["bytes_out"])
+            if state["response_started"] is not None:
+                metrics.observe("pdf_tools_stage_seconds", {"route": route, "stage": "response"}, finished - state["response_started"])
+            _current_route.reset(token)
+
 # Helper: save UploadFile to a temp file and return path
 def save_uploadfile_tmp(upload_file: UploadFile) -> str:
     suffix = os.path.splitext(upload_file.filename)[1] or ""
     fd, path = tempfile.mkstemp(suffix=suffix)
     os.close(fd)
-    with open(path, "wb") as buffer:
+    with stage("upload"), open(path, "wb") as buffer:
         shutil.copyfileobj(upload_file.file, buffer)
     return path
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+# Upload ingestion for PyMuPDF: Starlette already spools every upload, so open it where it
+# is instead of copying it into another temp file. Small uploads are read from memory;
+# larger ones are opened through the spool file's own descriptor.
+UPLOAD_MEMORY_MAX_BYTES = _env_int("UPLOAD_MEMORY_MAX_BYTES", 16 * 1024 * 1024)
+
+def _spool_path(f) -> Optional[str]:
+    # A path naming the already-open spool file, or None if it is still in memory
+    if not getattr(f, "_rolled", True):
+        return None
+    try:
+        path = f"/proc/self/fd/{f.fileno()}"
+    except (AttributeError, OSError):
+        return None
+    return path if os.path.exists(path) else None
+
+def open_upload_pdf(upload_file: UploadFile) -> fitz.Document:
+    f = upload_file.file
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    path = _spool_path(f) if size > UPLOAD_MEMORY_MAX_BYTES else None
+    with stage("open"):
+        if path is None:
+            doc = fitz.open(stream=f.read(), filetype="pdf")
+        else:
+            doc = fitz.open(path, filetype="pdf")
+    record_pages(doc.page_count)
+    return doc
+
+def pdf_bytes(doc: fitz.Document, **save_options) -> bytes:
+    with stage("encode"):
+        return doc.tobytes(**save_options)
+
+# Documents assembled from many inputs (merge, images to PDF) are checkpointed to a work file
+# every MERGE_FLUSH_EVERY inputs and reopened, which releases the objects already written,
+# so memory stays flat however many inputs there are.
+MERGE_FLUSH_EVERY = _env_int("MERGE_FLUSH_EVERY", 50)
+
+def checkpoint_pdf(doc: fitz.Document, work_path: str) -> fitz.Document:
+    # Append doc's changes to work_path, close it and return the reopened work file
+    with stage("encode"):
+        if doc.can_save_incrementally():
+            doc.save(work_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+            doc.close()
+        else:
+            # first checkpoint (nothing on disk yet) or a repaired file: write it out whole
+            doc.save(work_path + ".new")
+            doc.close()
+            os.replace(work_path + ".new", work_path)
+    return fitz.open(work_path)
+
+# --- Execution pools ---
+# Handlers are async, so anything blocking runs on one of these instead of the
+# event loop. "render" is a process pool for CPU-bound work (pdf2docx, Camelot,
+# rasterizing, Tesseract); "subprocess" threads wait on LibreOffice/Ghostscript/
+# wkhtmltopdf; "fitz" threads do light PyMuPDF edits and file I/O; "assemble" threads
+# build outputs that take many steps (result writers, multi-input documents), so a
+# long build never holds a thread the light tools need. Waiting on render results is
+# done on the event loop (aiter_in_pool), not by parking a thread.
+# Functions sent to the render pool must be module-level and must not raise
+# HTTPException (it does not survive pickling).
+def available_cpus() -> int:
+    # CPUs this process may actually use: its affinity mask, lowered to the cgroup CPU quota
+    # (docker --cpus / Kubernetes limits) when one is set; os.cpu_count() is the whole host
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    for path in ("/sys/fs/cgroup/cpu.max", "/sys/fs/cgroup/cpu/cpu.cfs_quota_us"):
+        try:
+            with open(path) as f:
+                fields = f.read().split()
+            if path.endswith("cpu.max"):
+                quota, period = fields[0], fields[1]
+            else:
+                with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+                    quota, period = fields[0], f.read().strip()
+        except (OSError, IndexError):
+            continue
+        if quota not in ("max", "-1"):
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+        break
+    return cpus
+
+# each render worker imports pdf2docx, camelot/cv2 and pandas, so the default stays small
+RENDER_WORKERS_MAX = _env_int("RENDER_WORKERS_MAX", 8)
+RENDER_WORKERS = _env_int("RENDER_WORKERS", min(available_cpus(), RENDER_WORKERS_MAX))
+SUBPROCESS_WORKERS = _env_int("SUBPROCESS_WORKERS", 4)
+FITZ_WORKERS = _env_int("FITZ_WORKERS", 4)
+ASSEMBLE_WORKERS = _env_int("ASSEMBLE_WORKERS", RENDER_WORKERS + 2)  # heavy admission slots plus job workers
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+def get_executor(kind: str):
+    with _executors_lock:
+        executor = _executors.get(kind)
+        if executor is None:
+            if kind == "render":
+                # spawn: never fork a process that already runs threads and an event loop
+                executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            elif kind == "subprocess":
+                executor = ThreadPoolExecutor(max_workers=SUBPROCESS_WORKERS, thread_name_prefix="subprocess")
+            elif kind == "fitz":
+                executor = ThreadPoolExecutor(max_workers=FITZ_WORKERS, thread_name_prefix="fitz")
+            elif kind == "assemble":
+                executor = ThreadPoolExecutor(max_workers=ASSEMBLE_WORKERS, thread_name_prefix="assemble")
+            else:
+                raise ValueError(f"Unknown executor kind: {kind}")
+            _executors[kind] = executor
+        return executor
+
+def _discard_executor(kind: str, executor):
+    # A dead worker process leaves a ProcessPoolExecutor broken for good; drop it so the
+    # next call builds a fresh pool (unless another caller already has)
+    with _executors_lock:
+        if _executors.get(kind) is executor:
+            del _executors[kind]
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def submit_to_pool(kind: str, fn, *args):
+    # executor.submit() that replaces a pool found broken before the call was queued; calls
+    # that were in flight when a worker died fail with BrokenProcessPool instead
+    executor = get_executor(kind)
+    try:
+        return executor, executor.submit(fn, *args)
+    except BrokenProcessPool:
+        _discard_executor(kind, executor)
+    executor = get_executor(kind)
+    return executor, executor.submit(fn, *args)
+
+async def run_in_pool(kind: str, fn, *args, **kwargs):
+    call = functools.partial(fn, *args, **kwargs)
+    if kind != "render":
+        # threads inherit the request context (route label for metrics); processes can't
+        call = functools.partial(contextvars.copy_context().run, call)
+    executor, future = submit_to_pool(kind, call)
+    try:
+        return await asyncio.wrap_future(future)
+    except BrokenProcessPool:
+        _discard_executor(kind, executor)
+        raise
+
+async def map_in_pool(kind: str, fn, calls: List[tuple], concurrency: Optional[int] = None, on_done=None) -> list:
+    # Run fn(*args) for every args tuple with at most `concurrency` in flight; results keep input order.
+    # on_done(index, result) is called as each call finishes, e.g. to report progress
+    if not concurrency or concurrency < 1:
+        concurrency = RENDER_WORKERS
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run_one(index, args):
+        async with limit:
+            result = await run_in_pool(kind, fn, *args)
+        if on_done:
+            on_done(index, result)
+        return result
+
+    return await asyncio.gather(*(run_one(i, args) for i, args in enumerate(calls)))
+
+def iter_in_pool(kind: str, fn, calls: List[tuple], prefetch: Optional[int] = None):
+    # Blocking generator for streaming bodies: yields fn(*args) results in order while keeping
+    # at most `prefetch` calls queued, so memory stays flat however many calls there are
+    prefetch = max(1, prefetch or RENDER_WORKERS)
+    pending = collections.deque()
+    calls = iter(calls)
+
+    def result(executor, future):
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            _discard_executor(kind, executor)
+            raise
+
+    try:
+        for args in calls:
+            pending.append(submit_to_pool(kind, fn, *args))
+            if len(pending) >= prefetch:
+                yield result(*pending.popleft())
+        while pending:
+            yield result(*pending.popleft())
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+async def aiter_in_pool(kind: str, fn, calls: List[tuple], prefetch: Optional[int] = None):
+    # Async counterpart of iter_in_pool: yields results in order with at most `prefetch` calls
+    # queued, waiting on the event loop. Close it with contextlib.aclosing when leaving early.
+    prefetch = max(1, prefetch or RENDER_WORKERS)
+    pending = collections.deque()
+    try:
+        for args in calls:
+            pending.append(asyncio.ensure_future(run_in_pool(kind, fn, *args)))
+            if len(pending) >= prefetch:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            if not task.cancel():
+                task.exception()  # already finished: mark a failure as retrieved
+
+@app.on_event("shutdown")
+def shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
+
+# --- Admission control ---
+# Requests are admitted per operation class before any upload is read. Heavy conversions
+# (rasterizing, OCR, pdf2docx, camelot, LibreOffice, Ghostscript) share a small number of slots;
+# light page tools get their own, so a backlog of conversions never starves them. GET routes
+# (/ping, /metrics, job status, downloads) are never queued. A class whose queue is full
+# answers 429 immediately; a request that waited ADMISSION_*_QUEUE_TIMEOUT seconds gets 503.
+# Both carry a Retry-After estimated from recent service times.
+HEAVY_ROUTES = {
+    "/convert/pdf-to-word", "/convert/word-to-pdf", "/convert/pdf-to-jpg", "/convert/jpg-to-pdf",
+    "/convert/pdf-to-excel", "/convert/excel-to-pdf", "/convert/html-to-pdf", "/convert/pdf-to-ppt",
+    "/convert/ppt-to-pdf", "/tools/ocr", "/tools/repair", "/tools/pdfa",
+}
+
+class AdmissionGate:
+    def __init__(self, name: str, concurrency: int, queue_size: int, queue_timeout: int):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_size = max(0, queue_size)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.avg_seconds = 1.0
+        self._slots = None  # created on first use, inside the server's event loop
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.avg_seconds * (self.waiting + 1) / self.concurrency))
+
+    async def acquire(self) -> Optional[int]:
+        # None once admitted, otherwise the status code to reject with
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        if not self._slots.locked():
+            await self._slots.acquire()  # a slot is free, so this returns without suspending
+            self.active += 1
+            return None
+        if self.waiting >= self.queue_size:
+            return 429
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return 503
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return None
+
+    def release(self, seconds: float):
+        self.active -= 1
+        self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * seconds
+        self._slots.release()
+
+admission_gates = {
+    "heavy": AdmissionGate("heavy", _env_int("ADMISSION_HEAVY_CONCURRENCY", RENDER_WORKERS),
+                           _env_int("ADMISSION_HEAVY_QUEUE", 2 * RENDER_WORKERS), _env_int("ADMISSION_HEAVY_QUEUE_TIMEOUT", 30)),
+    "light": AdmissionGate("light", _env_int("ADMISSION_LIGHT_CONCURRENCY", 4 * FITZ_WORKERS),
+                           _env_int("ADMISSION_LIGHT_QUEUE", 16 * FITZ_WORKERS), _env_int("ADMISSION_LIGHT_QUEUE_TIMEOUT", 10)),
+}
+metrics.describe("pdf_tools_admission_rejected_total", "counter", "Requests turned away by admission control")
+
+def _admission_class(scope) -> Optional[str]:
+    route = _route_template(scope)
+    if route in HEAVY_ROUTES:
+        return "heavy"
+    if scope["method"] == "POST":
+        return "light"
+    return None
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        gate = admission_gates.get(_admission_class(scope)) if scope["type"] == "http" else None
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+        rejected = await gate.acquire()
+        if rejected:
+            metrics.inc("pdf_tools_admission_rejected_total", {"class": gate.name, "status": str(rejected)})
+            detail = "Too many requests queued" if rejected == 429 else "Timed out waiting for a free worker"
+            response = JSONResponse({"detail": f"{detail}, retry later"}, status_code=rejected,
+                                    headers={"Retry-After": str(gate.retry_after())})
+            await response(scope, receive, send)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(time.perf_counter() - started)
+
+app.add_middleware(AdmissionMiddleware)
+# added last so it wraps admission control and also counts rejected requests
+app.add_middleware(MetricsMiddleware)
+
+# --- Responses ---
+# Results come back from memory whenever the library can hand us bytes (doc.tobytes()).
+# When a converter has to write a file, the file and its temp dir are deleted by a
+# background task once the response has been sent, so nothing piles up in /tmp.
+def temp_path(suffix: str = "") -> str:
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    return path
+
+def remove_paths(*paths: str):
+    for p in paths:
+        if not p:
+            continue
+        if os.path.isdir(p):
+            shutil.rmtree(p, ignore_errors=True)
+        else:
+            try: os.remove(p)
+            except: pass
+
+def attachment(filename: str) -> dict:
+    return {"Content-Disposition": f"attachment; filename={filename}"}
+
+def bytes_response(data: bytes, media_type: str, filename: str) -> Response:
+    return Response(data, media_type=media_type, headers=attachment(filename))
+
+def file_response(path: str, media_type: str, filename: str, cleanup: List[str] = ()) -> FileResponse:
+    return FileResponse(path, media_type=media_type, headers=attachment(filename),
+                        background=BackgroundTask(remove_paths, path, *cleanup))
+
+def iter_file(f, chunk_size: int = 1024 * 1024):
+    with f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            yield block
+
+# --- Result cache ---
+# Content-addressed: the key is a hash of the uploaded bytes, the operation and its
+# normalized parameters, so re-uploading the same file to the same endpoint is served
+# from disk (or memory) instead of converting again. LRU-evicted by total size.
+CACHE_DIR = os.environ.get("CACHE_DIR", os.path.join(tempfile.gettempdir(), "pdf_tools_cache"))
+CACHE_MAX_BYTES = _env_int("CACHE_MAX_BYTES", 1024 * 1024 * 1024)  # 0 disables the cache
+CACHE_MEMORY_MAX_BYTES = _env_int("CACHE_MEMORY_MAX_BYTES", 0)  # 0 disables the in-memory tier
+
+def upload_digest(upload_file: UploadFile) -> str:
+    h = hashlib.sha256()
+    upload_file.file.seek(0)
+    with stage("upload"):
+        for block in iter(lambda: upload_file.file.read(1024 * 1024), b""):
+            h.update(block)
+    upload_file.file.seek(0)
+    return h.hexdigest()
+
+class ResultCache:
+    def __init__(self, directory: str, max_bytes: int, memory_max_bytes: int = 0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self._entries = collections.OrderedDict()  # key -> size on disk, least recently used first
+        self._memory = collections.OrderedDict()  # key -> bytes
+        self._disk_bytes = 0
+        self._memory_bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    @staticmethod
+    def make_key(operation: str, digest: str, params: Optional[dict] = None) -> str:
+        payload = json.dumps({"op": operation, "input": digest, "params": params or {}}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self):
+        # Index whatever a previous process left on disk, oldest first. Runs once, on a pool
+        # thread at startup; lookups and writes also call it in case startup did not run.
+        with self._lock:
+            if self._loaded or not self.enabled:
+                return
+            self._loaded = True
+            os.makedirs(self.directory, exist_ok=True)
+            found = []
+            for name in os.listdir(self.directory):
+                p = self._path(name)
+                if name.endswith(".tmp"):
+                    remove_paths(p)
+                    continue
+                st = os.stat(p)
+                found.append((st.st_mtime, name, st.st_size))
+            for _, name, size in sorted(found):
+                self._entries[name] = size
+                self._disk_bytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._disk_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._disk_bytes -= size
+            self._drop_memory(key)
+            self.evictions += 1
+            metrics.inc("pdf_tools_cache_evictions_total", {})
+            remove_paths(self._path(key))
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            _, data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(data)
+
+    def _drop_memory(self, key: str):
+        data = self._memory.pop(key, None)
+        if data is not None:
+            self._memory_bytes -= len(data)
+
+    def open(self, key: str):
+        # Readable file object for a cached result, or None on a miss. Touches the disk, so
+        # call it on a pool thread (cached_response does).
+        if not self.enabled:
+            return None
+        self.load()
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                metrics.inc("pdf_tools_cache_hits_total", {"tier": "memory"})
+                return io.BytesIO(data)
+            if key in self._entries:
+                try:
+                    f = open(self._path(key), "rb")
+                except OSError:
+                    self._disk_bytes -= self._entries.pop(key)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    metrics.inc("pdf_tools_cache_hits_total", {"tier": "disk"})
+                    return f
+            self.misses += 1
+            metrics.inc("pdf_tools_cache_misses_total", {})
+            return None
+
+    def _commit(self, key: str, tmp_path: str):
+        size = os.path.getsize(tmp_path)
+        if size > self.max_bytes:
+            os.remove(tmp_path)
+            return
+        os.replace(tmp_path, self._path(key))
+        data = None
+        # only small results go to the memory tier, so one artifact can't flush it
+        if self.memory_max_bytes and size <= self.memory_max_bytes // 8:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+        with self._lock:
+            self._disk_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._disk_bytes += size
+            self._drop_memory(key)
+            if data is not None:
+                self._memory[key] = data
+                self._memory_bytes += size
+            self._evict()
+
+    def _tmp_path(self, key: str) -> str:
+        self.load()
+        return self._path(f"{key}.{uuid.uuid4().hex}.tmp")
+
+    def put_file(self, key: str, src_path: str):
+        if not self.enabled:
+            return
+        tmp = self._tmp_path(key)
+        shutil.copyfile(src_path, tmp)
+        self._commit(key, tmp)
+
+    def put_bytes(self, key: str, data: bytes):
+        if not self.enabled:
+            return
+        tmp = self._tmp_path(key)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        self._commit(key, tmp)
+
+    def tee(self, key: str, chunks):
+        # Pass a streamed body through unchanged, storing it only if it is sent completely
+        if not self.enabled:
+            yield from chunks
+            return
+        tmp = self._tmp_path(key)
+        completed = False
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            completed = True
+        finally:
+            if completed:
+                self._commit(key, tmp)
+            else:
+                remove_paths(tmp)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "disk_bytes": self._disk_bytes,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "max_bytes": self.max_bytes,
+                "memory_max_bytes": self.memory_max_bytes,
+            }
+
+result_cache = ResultCache(CACHE_DIR, CACHE_MAX_BYTES, CACHE_MEMORY_MAX_BYTES)
+metrics.describe("pdf_tools_cache_hits_total", "counter", "Result cache lookups served, by tier")
+metrics.describe("pdf_tools_cache_misses_total", "counter", "Result cache lookups that missed")
+metrics.describe("pdf_tools_cache_evictions_total", "counter", "Result cache entries evicted to stay under CACHE_MAX_BYTES")
+for labels in ({"tier": "memory"}, {"tier": "disk"}):
+    metrics.inc("pdf_tools_cache_hits_total", labels, 0)  # export 0 from the start so rate() has a baseline
+metrics.inc("pdf_tools_cache_misses_total", {}, 0)
+metrics.inc("pdf_tools_cache_evictions_total", {}, 0)
+
+@app.on_event("startup")
+async def load_result_cache():
+    await run_in_pool("fitz", result_cache.load)
+
+async def cached_response(key: str, media_type: str, filename: Optional[str]) -> Optional[StreamingResponse]:
+    # filename None serves the result inline rather than as an attachment
+    f = await run_in_pool("fitz", result_cache.open, key)
+    if f is None:
+        return None
+    return StreamingResponse(iter_file(f), media_type=media_type, headers=attachment(filename) if filename else None)
+
+# --- LibreOffice worker pool ---
+# Long-lived headless soffice instances, each with its own user profile so that
+# concurrent conversions never share (and lock) the default profile. Each worker keeps
+# a soffice process listening on a pipe named for that worker and that start, so it
+# can never talk to a stale or foreign instance, and converts over it through UNO: in-process when
+# this Python can import the bindings, otherwise through office_bridge.py running under
+# an interpreter that can (Debian's python3-uno on /usr/bin/python3, as in the Docker
+# image). Only when no UNO-capable Python exists does a worker fall back to a one-shot
+# --convert-to run on its own, already initialised profile. Requests wait for an idle
+# worker on the event loop and only then take a subprocess thread; the pool is started
+# in the background at startup so the first requests do not pay for a cold start.
+try:
+    import office_bridge
+except ImportError:
+    office_bridge = None
+
+LIBREOFFICE_POOL_SIZE = _env_int("LIBREOFFICE_POOL_SIZE", 2)
+LIBREOFFICE_MAX_CONVERSIONS = _env_int("LIBREOFFICE_MAX_CONVERSIONS", 200)  # recycle a worker after N jobs
+LIBREOFFICE_STARTUP_TIMEOUT = _env_int("LIBREOFFICE_STARTUP_TIMEOUT", 30)
+LIBREOFFICE_CONVERT_TIMEOUT = _env_int("LIBREOFFICE_CONVERT_TIMEOUT", 300)
+LIBREOFFICE_ACQUIRE_TIMEOUT = _env_int("LIBREOFFICE_ACQUIRE_TIMEOUT", 120)
+LIBREOFFICE_PREWARM = _env_int("LIBREOFFICE_PREWARM", 1)  # 0 starts workers on first use instead
+LIBREOFFICE_PYTHON = os.environ.get("LIBREOFFICE_PYTHON")  # interpreter with the UNO bindings, for the bridge
+OFFICE_BRIDGE_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "office_bridge.py")
+
+def find_libreoffice() -> Optional[str]:
+    lo = shutil.which("soffice") or shutil.which("libreoffice")
+    if lo:
+        return lo
+    for candidate in ("/usr/bin/soffice", "/usr/lib/libreoffice/program/soffice"):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+@functools.lru_cache(maxsize=None)
+def bridge_python() -> Optional[str]:
+    # First interpreter that can import uno: LIBREOFFICE_PYTHON, the one bundled with
+    # upstream LibreOffice builds, then the distro python3
+    candidates = [LIBREOFFICE_PYTHON] if LIBREOFFICE_PYTHON else []
+    lo = find_libreoffice()
+    if lo:
+        candidates.append(os.path.join(os.path.dirname(os.path.realpath(lo)), "python"))
+    candidates.append("/usr/bin/python3")
+    for python in candidates:
+        if not os.path.exists(python):
+            continue
+        try:
+            probe = subprocess.run([python, "-c", "import uno"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=30)
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        if probe.returncode == 0:
+            return python
+    return None
+
+def office_mode() -> str:
+    # "uno" (in-process), "bridge" (office_bridge.py subprocess) or "cli" (one-shot --convert-to)
+    if office_bridge is not None:
+        return "uno"
+    return "bridge" if bridge_python() else "cli"
+
+class OfficeWorker:
+    def __init__(self, index: int):
+        self.index = index
+        self.pipe_name = None
+        self.profile_dir = tempfile.mkdtemp(prefix=f"lo_profile_{index}_")
+        self.proc = None
+        self.bridge = None
+        self.desktop = None
+        self.conversions = 0
+
+    def _base_args(self, lo: str) -> List[str]:
+        return [
+            lo,
+            f"-env:UserInstallation={Path(self.profile_dir).as_uri()}",
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--nolockcheck",
+            "--nodefault",
+            "--norestore",
+            "--nofirststartwizard",
+        ]
+
+    def healthy(self) -> bool:
+        mode = office_mode()
+        if mode == "cli":
+            return True
+        if self.proc is None or self.proc.poll() is not None:
+            return False
+        if mode == "bridge":
+            return self.bridge is not None and self.bridge.poll() is None
+        return self.desktop is not None
+
+    def start(self):
+        self.conversions = 0
+        mode = office_mode()
+        if mode == "cli":
+            return
+        lo = find_libreoffice()
+        if not lo:
+            raise RuntimeError("LibreOffice not available")
+        # a fresh name per start: a leftover soffice from an earlier run can never answer on it
+        self.pipe_name = f"pdf_tools_lo_{os.getpid()}_{self.index}_{uuid.uuid4().hex[:8]}"
+        self.proc = subprocess.Popen(
+            self._base_args(lo) + [f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            if mode == "bridge":
+                self.bridge = subprocess.Popen(
+                    [bridge_python(), OFFICE_BRIDGE_SCRIPT, self.pipe_name, str(LIBREOFFICE_STARTUP_TIMEOUT)],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                )
+                # the bridge says it is ready once it has connected to our soffice
+                deadline = time.monotonic() + LIBREOFFICE_STARTUP_TIMEOUT
+                while True:
+                    if self.proc.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("soffice exited or timed out")
+                    try:
+                        self._bridge_reply(0.1)
+                        break
+                    except subprocess.TimeoutExpired:
+                        continue
+            else:
+                self.desktop = office_bridge.connect(self.pipe_name, LIBREOFFICE_STARTUP_TIMEOUT)
+        except Exception:
+            self.stop()
+            raise RuntimeError(f"LibreOffice worker {self.index} failed to start")
+
+    def stop(self):
+        self.desktop = None
+        for proc in (self.bridge, self.proc):
+            if proc is not None and proc.poll() is None:
+                proc.terminate()
+                try:
+                    proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+        self.bridge = None
+        self.proc = None
+
+    def restart(self):
+        self.stop()
+        self.start()
+
+    def _bridge_reply(self, timeout: float) -> dict:
+        # Next JSON line from the bridge; TimeoutExpired if none arrives in time
+        ready, _, _ = select.select([self.bridge.stdout], [], [], timeout)
+        if not ready:
+            raise subprocess.TimeoutExpired(OFFICE_BRIDGE_SCRIPT, timeout)
+        line = self.bridge.stdout.readline()
+        if not line:
+            raise RuntimeError("LibreOffice bridge exited")
+        return json.loads(line)
+
+    def convert(self, path: str, out_dir: str, filter_name: str) -> str:
+        pdf_path = os.path.join(out_dir, os.path.splitext(os.path.basename(path))[0] + ".pdf")
+        mode = office_mode()
+        if mode == "cli":
+            lo = find_libreoffice()
+            if not lo:
+                raise RuntimeError("LibreOffice not available")
+            subprocess.run(
+                self._base_args(lo) + ["--convert-to", f"pdf:{filter_name}", "--outdir", out_dir, path],
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                timeout=LIBREOFFICE_CONVERT_TIMEOUT,
+            )
+        elif mode == "bridge":
+            self.bridge.stdin.write(json.dumps({"path": path, "pdf_path": pdf_path, "filter": filter_name}) + "\n")
+            self.bridge.stdin.flush()
+            reply = self._bridge_reply(LIBREOFFICE_CONVERT_TIMEOUT)
+            if "error" in reply:
+                raise RuntimeError(reply["error"])
+        else:
+            office_bridge.convert(self.desktop, path, pdf_path, filter_name)
+        self.conversions += 1
+        return pdf_path
+
+class OfficePool:
+    def __init__(self, size: int, max_conversions: int):
+        self.size = max(1, size)
+        self.max_conversions = max_conversions
+        self._idle = None  # asyncio.Queue of workers, created inside the server's event loop
+        self._workers = []
+        self.warming = None
+
+    def _ensure_workers(self):
+        # workers are created lazily so importing this module never spawns soffice
+        if self._idle is not None:
+            return
+        self._idle = asyncio.Queue()
+        for i in range(self.size):
+            worker = OfficeWorker(i)
+            self._workers.append(worker)
+            self._idle.put_nowait(worker)
+
+    def _ready(self, worker: OfficeWorker):
+        if not worker.healthy() or worker.conversions >= self.max_conversions:
+            worker.restart()
+
+    def _convert_on(self, worker: OfficeWorker, path: str, filter_name: str) -> str:
+        out_dir = tempfile.mkdtemp()
+        try:
+            self._ready(worker)
+            return worker.convert(path, out_dir, filter_name)
+        except Exception:
+            # a failed conversion may leave the instance wedged; recycle it on next use
+            worker.stop()
+            shutil.rmtree(out_dir, ignore_errors=True)
+            raise
+
+    async def _with_worker(self, fn, *args, timeout: Optional[float] = None):
+        # Wait for an idle worker here on the event loop, then run fn(worker, *args) on a
+        # subprocess thread; the worker only goes back to the pool once that thread is done
+        self._ensure_workers()
+        try:
+            worker = await asyncio.wait_for(self._idle.get(), timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="All LibreOffice workers are busy")
+        task = asyncio.ensure_future(run_in_pool("subprocess", fn, worker, *args))
+
+        def release(task):
+            if not task.cancelled():
+                task.exception()  # retrieved here if the request went away meanwhile
+            if self._idle is not None:
+                self._idle.put_nowait(worker)
+
+        task.add_done_callback(release)
+        return await asyncio.shield(task)
+
+    async def convert(self, path: str, filter_name: str) -> str:
+        # Convert path to PDF on an idle worker; returns the PDF path inside a fresh temp dir
+        return await self._with_worker(self._convert_on, path, filter_name, timeout=LIBREOFFICE_ACQUIRE_TIMEOUT)
+
+    async def warm(self):
+        # Start every worker ahead of the first request; failures are retried on first use
+        if await run_in_pool("subprocess", office_mode) == "cli" or not find_libreoffice():
+            return
+        self._ensure_workers()
+        await asyncio.gather(*(self._with_worker(self._ready) for _ in range(self.size)), return_exceptions=True)
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+            shutil.rmtree(worker.profile_dir, ignore_errors=True)
+        self._workers = []
+        self._idle = None
+
+office_pool = OfficePool(LIBREOFFICE_POOL_SIZE, LIBREOFFICE_MAX_CONVERSIONS)
+
+@app.on_event("startup")
+async def warm_office_pool():
+    if LIBREOFFICE_PREWARM:
+        office_pool.warming = asyncio.get_running_loop().create_task(office_pool.warm())
+
+@app.on_event("shutdown")
+def shutdown_office_pool():
+    office_pool.shutdown()
+
+async def office_to_pdf_response(upload_file: UploadFile, filter_name: str):
+    key = ResultCache.make_key(filter_name, await run_in_pool("fitz", upload_digest, upload_file))
+    hit = await cached_response(key, "application/pdf", os.path.splitext(os.path.basename(upload_file.filename or "converted"))[0] + ".pdf")
+    if hit:
+        return hit
+    path = await run_in_pool("fitz", save_uploadfile_tmp, upload_file)
+    try:
+        with stage("convert", "libreoffice"):
+            pdf_path = await office_pool.convert(path, filter_name)
+        out_dir = os.path.dirname(pdf_path)
+        if not os.path.exists(pdf_path):
+            remove_paths(out_dir)
+            raise HTTPException(status_code=500, detail="PDF conversion failed")
+        await run_in_pool("fitz", result_cache.put_file, key, pdf_path)
+        return file_response(pdf_path, "application/pdf", os.path.basename(pdf_path), cleanup=[out_dir])
+    except subprocess.CalledProcessError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=e.stderr.decode(errors="ignore") or "LibreOffice conversion error"
+        )
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        raise HTTPException(status_code=500, detail=str(e) or "LibreOffice conversion error")
+    finally:
+        remove_paths(path)
+
+# --- Rasterization ---
+# Page rendering for pdf-to-jpg, pdf-to-ppt and OCR. The default "fitz" engine renders pixmaps
+# in-process; "pdf2image" (poppler's pdftoppm via a subprocess and PPM files) is kept as a fallback.
+RASTER_ENGINE = os.getenv("RASTER_ENGINE", "fitz")
+# Pixel budget per rendered page: a large page at a high dpi (A0 at 1200 dpi is ~1.5 gigapixels)
+# would otherwise take gigabytes in a render worker. The dpi is lowered to fit, like max_dim.
+RENDER_MAX_PIXELS = _env_int("RENDER_MAX_PIXELS", 40_000_000)  # ~120 MB of RGB; 0 disables
+
+def _render_zoom(width: float, height: float, dpi: int, max_dim: Optional[int]) -> float:
+    # pixels per PDF point for an area of width x height points, within max_dim and RENDER_MAX_PIXELS
+    zoom = dpi / 72
+    if max_dim:
+        zoom = min(zoom, max_dim / max(width, height, 1))
+    if RENDER_MAX_PIXELS > 0:
+        zoom = min(zoom, math.sqrt(RENDER_MAX_PIXELS / max(width * height, 1)))
+    return zoom
+
+def _fitz_pages(path: str, pages: Iterable[int], dpi: int, colorspace: str, clip, max_dim: Optional[int]):
+    gray = colorspace == "gray"
+    doc = fitz.open(path)
+    try:
+        for n in pages:
+            page = doc.load_page(n - 1)
+            area = fitz.Rect(clip) if clip else page.rect
+            # render straight at the target size rather than downscaling afterwards
+            zoom = _render_zoom(area.width, area.height, dpi, max_dim)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY if gray else fitz.csRGB,
+                                  clip=area if clip else None, alpha=False)
+            yield Image.frombytes("L" if gray else "RGB", (pix.width, pix.height), pix.samples)
+    finally:
+        doc.close()
+
+def _pdf2image_pages(path: str, pages: Iterable[int], dpi: int, colorspace: str, clip, max_dim: Optional[int]):
+    # pdftoppm takes first/last page, so consecutive pages are rendered in one call, at the
+    # highest dpi that keeps every page of the run within RENDER_MAX_PIXELS
+    pages = list(pages)
+    runs = []
+    for n in pages:
+        if runs and n == runs[-1][1] + 1:
+            runs[-1][1] = n
+        else:
+            runs.append([n, n])
+    doc = fitz.open(path)
+    try:
+        rects = {n: doc[n - 1].rect for n in pages}
+    finally:
+        doc.close()
+    for first, last in runs:
+        run_dpi = min(dpi, *(max(1, int(_render_zoom(rects[n].width, rects[n].height, dpi, None) * 72)) for n in range(first, last + 1)))
+        scale = run_dpi / 72
+        for img in convert_from_path(path, dpi=run_dpi, first_page=first, last_page=last, grayscale=colorspace == "gray"):
+            if clip:
+                img = img.crop(tuple(round(v * scale) for v in clip))
+            if max_dim:
+                img.thumbnail((max_dim, max_dim))
+            yield img
+
+RASTER_ENGINES = {"fitz": _fitz_pages, "pdf2image": _pdf2image_pages}
+
+def render_pages(path: str, pages: Optional[Iterable[int]] = None, dpi: int = 150, colorspace: str = "rgb",
+                 clip=None, max_dim: Optional[int] = None, engine: Optional[str] = None):
+    # Yields one PIL image per page (1-based page numbers, all pages by default).
+    # colorspace: "rgb" or "gray"; clip: (x0, y0, x1, y1) in PDF points;
+    # max_dim: cap on the longer side in pixels (dpi is lowered to fit, never raised);
+    # RENDER_MAX_PIXELS caps the pixel count the same way.
+    engine = engine or RASTER_ENGINE
+    if engine not in RASTER_ENGINES:
+        raise ValueError(f"Unknown raster engine: {engine}")
+    if pages is None:
+        pages = range(1, pdf_page_count(path) + 1)
+    return RASTER_ENGINES[engine](path, pages, dpi, colorspace, clip, max_dim)
+
+def render_page(path: str, page_no: int, dpi: int = 150, colorspace: str = "rgb", clip=None,
+                max_dim: Optional[int] = None, engine: Optional[str] = None) -> Image.Image:
+    with contextlib.closing(render_pages(path, [page_no], dpi, colorspace, clip, max_dim, engine)) as images:
+        return next(images)
+
 # HEALTH (use this for external pings)
 @app.get("/ping")
 async def ping():
     return {"status": "ok", "message": "pong"}
 
 # 1. PDF -> Word (pdf2docx)
-@app.post("/convert/pdf-to-word")
-async def pdf_to_word(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
-    out = tempfile.NamedTemporaryFile(suffix=".docx", delete=False)
-    out_path = out.name
-    out.close()
-    try:
-        cv = Converter(path)
-        cv.convert(out_path, start=0, end=None)
+# Long documents are split into chunks of PDF2DOCX_CHUNK_PAGES pages; each chunk is converted in
+# its own render worker and the DOCX bodies are stitched back together in page order.
+PDF2DOCX_CHUNK_PAGES = _env_int("PDF2DOCX_CHUNK_PAGES", 16)
+
+def _convert_pdf_to_docx(path: str, out_path: str, pages: Optional[List[int]] = None):
+    # pages are 0-based; pdf2docx skips parsing every page not listed
+    cv = Converter(path)
+    try:
+        cv.convert(out_path, pages=pages)
+    finally:
         cv.close()
-        return StreamingResponse(open(out_path, "rb"), media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                                 headers={"Content-Disposition": f"attachment; filename={os.path.basename(out_path)}"})
+
+def _merge_docx(paths: List[str], out_path: str):
+    # Every chunk is generated from the same pdf2docx template, so styles and numbering
+    # definitions already agree; what needs care is relationship ids (images, hyperlinks) and
+    # section properties, which carry each page's size and margins.
+    master = DocxDocument(paths[0])
+    body = master.element.body
+    r_ns = "{%s}" % nsmap["r"]
+    for part_path in paths[1:]:
+        chunk = DocxDocument(part_path)
+        rel_ids = {}
+
+        def remap(rid):
+            if rid not in rel_ids:
+                rel = chunk.part.rels[rid]
+                if rel.is_external:
+                    rel_ids[rid] = master.part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+                elif rel.reltype == RT.IMAGE:
+                    rel_ids[rid], _ = master.part.get_or_add_image(io.BytesIO(rel.target_part.blob))
+                else:
+                    rel_ids[rid] = master.part.relate_to(rel.target_part, rel.reltype)
+            return rel_ids[rid]
+
+        # The master's closing section becomes a section break, as python-docx's add_section does
+        last = body.sectPr
+        if last is not None:
+            p = OxmlElement("w:p")
+            p_pr = OxmlElement("w:pPr")
+            p_pr.append(copy.deepcopy(last))
+            p.append(p_pr)
+            last.addprevious(p)
+        for el in chunk.element.body:
+            if el.tag == qn("w:sectPr"):
+                continue
+            el = copy.deepcopy(el)
+            for node in el.iter():
+                for attr, value in node.attrib.items():
+                    if attr.startswith(r_ns) and value in chunk.part.rels:
+                        node.set(attr, remap(value))
+            if last is not None:
+                last.addprevious(el)
+            else:
+                body.append(el)
+        if last is not None and chunk.element.body.sectPr is not None:
+            new_last = copy.deepcopy(chunk.element.body.sectPr)
+            body.replace(last, new_last)
+    # Drawing ids must be unique across the merged document
+    for i, doc_pr in enumerate(body.iter(qn("wp:docPr")), 1):
+        doc_pr.set("id", str(i))
+    master.save(out_path)
+
+async def convert_pdf_to_docx(path: str, out_path: str, pages: Optional[str] = None, parallel: Optional[bool] = None,
+                              concurrency: Optional[int] = None, progress=None):
+    # pages: same grammar as parse_page_ranges ("1-3,7"); only those pages are parsed.
+    # parallel=None converts in chunks only when the selection spans more than one chunk.
+    page_count = await run_in_pool("fitz", pdf_page_count, path)
+    if pages:
+        try:
+            selected = [p - 1 for p in parse_page_ranges(pages, page_count)]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid page range")
+        if not selected:
+            raise HTTPException(status_code=400, detail="Page range selects no pages")
+    else:
+        selected = list(range(page_count))
+    total = len(selected)
+    size = max(1, PDF2DOCX_CHUNK_PAGES)
+    chunks = [selected[i:i + size] for i in range(0, total, size)]
+    if parallel is False or len(chunks) < 2:
+        with stage("convert", "pdf2docx"):
+            await run_in_pool("render", _convert_pdf_to_docx, path, out_path, selected if pages else None)
+        if progress:
+            progress(total, total)
+        return
+    parts = [temp_path(".docx") for _ in chunks]
+    calls = [(path, part, chunk) for part, chunk in zip(parts, chunks)]
+    on_done = (lambda i, _: progress(len(chunks[i]), total)) if progress else None
+
+    try:
+        with stage("convert", "pdf2docx"):
+            await map_in_pool("render", _convert_pdf_to_docx, calls, concurrency, on_done)
+        with stage("encode", "python-docx"):
+            await run_in_pool("render", _merge_docx, parts, out_path)
+    finally:
+        remove_paths(*parts)
+
+def _word_params(pages: Optional[str]) -> dict:
+    # cache parameters; the endpoint and jobs build the same key
+    return {"pages": pages} if pages else {}
+
+@app.post("/convert/pdf-to-word")
+async def pdf_to_word(file: UploadFile = File(...), pages: Optional[str] = Form(None),
+                      parallel: Optional[bool] = Form(None), concurrency: Optional[int] = Form(None)):
+    key = ResultCache.make_key("pdf-to-word", await run_in_pool("fitz", upload_digest, file), _word_params(pages))
+    hit = await cached_response(key, "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "converted.docx")
+    if hit:
+        return hit
+    path = await run_in_pool("fitz", save_uploadfile_tmp, file)
+    out_path = temp_path(".docx")
+    try:
+        await convert_pdf_to_docx(path, out_path, pages, parallel, concurrency)
+        await run_in_pool("fitz", result_cache.put_file, key, out_path)
+    except BaseException:
+        remove_paths(out_path)
+        raise
     finally:
-        try: os.remove(path)
-        except: pass
+        remove_paths(path)
+    return file_response(out_path, "application/vnd.openxmlformats-officedocument.wordprocessingml.document", os.path.basename(out_path))
 
 from fastapi import UploadFile, File, HTTPException
 from fastapi.responses import StreamingResponse
@@ -59,256 +1261,654 @@ import shutil
 
 @app.post("/convert/word-to-pdf")
 async def word_to_pdf(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
-    tmp_dir = tempfile.mkdtemp()
+    return await office_to_pdf_response(file, "writer_pdf_Export")
 
+# 3. PDF -> JPG (export each page as JPG, return zip if multiple)
+# format -> (PIL format, extension, media type)
+IMAGE_FORMATS = {
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "jpg": ("JPEG", "jpg", "image/jpeg"),
+    "png": ("PNG", "png", "image/png"),
+    "webp": ("WEBP", "webp", "image/webp"),
+}
+THUMBNAIL_MAX_DIM = _env_int("THUMBNAIL_MAX_DIM", 256)
+
+def _render_image(path: str, page_no: int, dpi: int, fmt: str = "jpeg", quality: int = 75, max_dim: Optional[int] = None) -> bytes:
+    img = render_page(path, page_no, dpi, max_dim=max_dim)
+    pil_format = IMAGE_FORMATS[fmt][0]
+    b = io.BytesIO()
+    if pil_format == "PNG":
+        img.save(b, format="PNG")
+    else:
+        img.save(b, format=pil_format, quality=quality)
+    return b.getvalue()
+
+def _image_zip_stream(path: str, pages: List[int], render_args: tuple, ext: str, cache_key: str):
+    # One page is rendered, encoded and flushed at a time, so memory does not grow with page count
+    images = iter_in_pool("render", _render_image, [(path, n) + render_args for n in pages])
     try:
-        # 🔍 Find LibreOffice binary (Railway-safe)
-        lo = (
-            shutil.which("soffice")
-            or shutil.which("libreoffice")
-            or "/usr/bin/soffice"
-            or "/usr/lib/libreoffice/program/soffice"
-        )
+        yield from result_cache.tee(cache_key, iter_zip((f"page_{n}.{ext}", data) for n, data in zip(pages, images)))
+    finally:
+        images.close()
+        remove_paths(path)
 
-        if not lo or not os.path.exists(lo):
-            raise HTTPException(status_code=500, detail="LibreOffice not available")
-
-        subprocess.run(
-            [
-                lo,
-                "--headless",
-                "--nologo",
-                "--nolockcheck",
-                "--nodefault",
-                "--nofirststartwizard",
-                "--convert-to", "pdf",
-                "--outdir", tmp_dir,
-                path,
-            ],
-            check=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+@app.post("/convert/pdf-to-jpg")
+async def pdf_to_jpg(file: UploadFile = File(...), dpi: int = Form(200), quality: int = Form(75), format: str = Form("jpeg"),
+                     max_dim: Optional[int] = Form(None), pages: Optional[str] = Form(None), thumbnail: bool = Form(False)):
+    # thumbnail: render each page straight at THUMBNAIL_MAX_DIM pixels (or max_dim) on its longer side
+    fmt = format.lower()
+    if fmt not in IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be jpeg, png or webp")
+    if not 1 <= dpi <= 1200:
+        raise HTTPException(status_code=400, detail="dpi must be between 1 and 1200")
+    if not 1 <= quality <= 100:
+        raise HTTPException(status_code=400, detail="quality must be between 1 and 100")
+    if max_dim is not None and max_dim < 1:
+        raise HTTPException(status_code=400, detail="max_dim must be positive")
+    if thumbnail:
+        max_dim = max_dim or THUMBNAIL_MAX_DIM
+    _, ext, media_type = IMAGE_FORMATS[fmt]
+    params = {"dpi": dpi}
+    for name, value, default in (("quality", quality, 75), ("format", ext, "jpg"), ("max_dim", max_dim, None), ("pages", pages, None)):
+        if value != default:
+            params[name] = value
+    path = await run_in_pool("fitz", save_uploadfile_tmp, file)
+    streaming = False
+    try:
+        page_count = await run_in_pool("fitz", pdf_page_count, path)
+        try:
+            selected = parse_page_ranges(pages, page_count) if pages else list(range(1, page_count + 1))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid page range")
+        if not selected:
+            raise HTTPException(status_code=400, detail="Page range selects no pages")
+        key = ResultCache.make_key("pdf-to-jpg", await run_in_pool("fitz", upload_digest, file), params)
+        render_args = (dpi, fmt, quality, max_dim)
+        # A single page comes back as one image, several as a streamed zip
+        if len(selected) == 1:
+            filename = f"page{selected[0]}.{ext}"
+            hit = await cached_response(key, media_type, filename)
+            if hit:
+                return hit
+            with stage("convert", RASTER_ENGINE):
+                data = await run_in_pool("render", _render_image, path, selected[0], *render_args)
+            await run_in_pool("fitz", result_cache.put_bytes, key, data)
+            return bytes_response(data, media_type, filename)
+        hit = await cached_response(key, "application/zip", "pages.zip")
+        if hit:
+            return hit
+        streaming = True
+        return StreamingResponse(_image_zip_stream(path, selected, render_args, ext, key), media_type="application/zip", headers=attachment("pages.zip"))
+    finally:
+        # the zip stream removes the upload itself once it has been sent
+        if not streaming:
+            remove_paths(path)
 
-        base = os.path.splitext(os.path.basename(path))[0] + ".pdf"
-        pdf_path = os.path.join(tmp_dir, base)
+# 4. JPG -> PDF
+# Uploads are read one at a time and their bytes handed to fitz insert_image(stream=...), so
+# JPEGs are embedded as-is (no decode, no recompression); PIL only reads the header for the
+# pixel size. Formats fitz cannot embed are converted to PNG first. Pages are sized to the
+# image (1px = 1pt, as before) or to a paper size, and the document is checkpointed like merge.
+# The build runs on the assemble pool so a long image set never holds a fitz thread.
+IMAGE_FITS = ("contain", "stretch", "original")
 
-        if not os.path.exists(pdf_path):
-            raise HTTPException(status_code=500, detail="PDF conversion failed")
+def _image_rect(page_rect: fitz.Rect, width: int, height: int, fit: str, margin: float) -> fitz.Rect:
+    area = fitz.Rect(page_rect.x0 + margin, page_rect.y0 + margin, page_rect.x1 - margin, page_rect.y1 - margin)
+    if fit == "stretch":
+        return area
+    scale = min(area.width / width, area.height / height)
+    if fit == "original":
+        scale = min(scale, 1.0)  # 1px = 1pt unless that overflows the page
+    w, h = width * scale, height * scale
+    x0, y0 = area.x0 + (area.width - w) / 2, area.y0 + (area.height - h) / 2
+    return fitz.Rect(x0, y0, x0 + w, y0 + h)
 
-        return StreamingResponse(
-            open(pdf_path, "rb"),
-            media_type="application/pdf",
-            headers={"Content-Disposition": f"attachment; filename={base}"}
-        )
+def _images_to_pdf(files: List[UploadFile], out_path: str, page_size: str = "image", orientation: str = "auto",
+                   fit: str = "contain", margin: float = 0):
+    flush_every = max(1, MERGE_FLUSH_EVERY)
+    work_path = temp_path(".pdf")
+    doc = fitz.open()
+    try:
+        for i, f in enumerate(files, start=1):
+            f.file.seek(0)
+            with stage("upload"):
+                data = f.file.read()
+            try:
+                with Image.open(io.BytesIO(data)) as img:
+                    width, height = img.size
+            except Exception:
+                raise HTTPException(status_code=400, detail=f"Unsupported image: {f.filename}")
+            if page_size == "image":
+                pw, ph = width + 2 * margin, height + 2 * margin
+            else:
+                pw, ph = fitz.paper_size(page_size)
+                landscape = width > height if orientation == "auto" else orientation == "landscape"
+                if landscape != (pw > ph):
+                    pw, ph = ph, pw
+            page = doc.new_page(width=pw, height=ph)
+            if 2 * margin >= min(pw, ph):
+                raise HTTPException(status_code=400, detail="margin leaves no room for the image")
+            rect = _image_rect(page.rect, width, height, fit, margin)
+            try:
+                page.insert_image(rect, stream=data, keep_proportion=fit != "stretch")
+            except (RuntimeError, ValueError):
+                with Image.open(io.BytesIO(data)) as img:
+                    buf = io.BytesIO()
+                    img.convert("RGBA" if "A" in img.getbands() else "RGB").save(buf, format="PNG")
+                page.insert_image(rect, stream=buf.getvalue(), keep_proportion=fit != "stretch")
+            data = None
+            if i % flush_every == 0 and i < len(files):
+                doc = checkpoint_pdf(doc, work_path)
+        with stage("encode"):
+            doc.save(out_path, garbage=3, deflate=True)
+    finally:
+        doc.close()
+        remove_paths(work_path, work_path + ".new")
 
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(
-            status_code=500,
-            detail=e.stderr.decode(errors="ignore") or "LibreOffice conversion error"
-        )
+@app.post("/convert/jpg-to-pdf")
+async def jpg_to_pdf(files: List[UploadFile] = File(...), page_size: str = Form("image"), orientation: str = Form("auto"),
+                     fit: str = Form("contain"), margin: float = Form(0)):
+    # page_size: "image" (page matches each image) or a paper name such as a4, letter, legal
+    page_size = page_size.lower()
+    if page_size != "image" and fitz.paper_size(page_size) == (-1, -1):
+        raise HTTPException(status_code=400, detail=f"Unknown page size: {page_size}")
+    if orientation not in ("auto", "portrait", "landscape"):
+        raise HTTPException(status_code=400, detail="orientation must be auto, portrait or landscape")
+    if fit not in IMAGE_FITS:
+        raise HTTPException(status_code=400, detail=f"fit must be one of {', '.join(IMAGE_FITS)}")
+    if margin < 0:
+        raise HTTPException(status_code=400, detail="margin must not be negative")
+    out_path = temp_path(".pdf")
+    try:
+        with stage("convert", "fitz"):
+            await run_in_pool("assemble", _images_to_pdf, files, out_path, page_size, orientation, fit, margin)
+    except BaseException:
+        remove_paths(out_path)
+        raise
+    return file_response(out_path, "application/pdf", "converted.pdf")
+
+# 5. PDF -> Excel (Camelot)
+# Each page gets one Camelot flavor, chosen from its vector graphics: pages with enough
+# horizontal and vertical ruling lines go to lattice, the rest to stream. Every planned page
+# is parsed with its flavor, in page order, in chunks of TABLE_CHUNK_PAGES across the render
+# pool. A lattice page that comes back empty (borderless table on a page with rules) is
+# retried with stream in the same chunk; no other page is parsed twice.
+TABLE_CHUNK_PAGES = _env_int("TABLE_CHUNK_PAGES", 4)
+# format -> (media type, download name)
+TABLE_FORMATS = {
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "tables.xlsx"),
+    "csv": ("application/zip", "tables.zip"),
+    "parquet": ("application/vnd.apache.parquet", "tables.parquet"),
+    "json": ("application/json", "tables.json"),
+}
+TABLE_MIN_RULINGS = 3  # crossing horizontal and vertical rules each, for a ruled grid (a box has 2)
+# Pre-filter: pages scoring below TABLE_MIN_SCORE are not handed to Camelot at all
+TABLE_MIN_SCORE = _env_int("TABLE_MIN_SCORE", 2)
+
+def _page_rulings(page: fitz.Page):
+    # (horizontal, vertical) rules of at least 10pt, as (position, start, end). Only stroked
+    # lines and rectangle edges count, plus filled bars at most 2pt thick (rules drawn as
+    # thin fills); other fills (backgrounds, header bars, shading) and page frames do not.
+    h, v = set(), set()
+    frame = page.rect
+    for drawing in page.get_drawings():
+        stroked = "s" in (drawing.get("type") or "") and drawing.get("color") is not None
+        for item in drawing["items"]:
+            if item[0] == "l" and stroked:
+                segments = [(item[1], item[2])]
+            elif item[0] == "re":
+                r = item[1]
+                if r.width >= 0.8 * frame.width and r.height >= 0.8 * frame.height:
+                    continue
+                if r.height <= 2:
+                    mid = (r.y0 + r.y1) / 2
+                    segments = [(fitz.Point(r.x0, mid), fitz.Point(r.x1, mid))]
+                elif r.width <= 2:
+                    mid = (r.x0 + r.x1) / 2
+                    segments = [(fitz.Point(mid, r.y0), fitz.Point(mid, r.y1))]
+                elif stroked:
+                    segments = [(r.tl, r.tr), (r.bl, r.br), (r.tl, r.bl), (r.tr, r.br)]
+                else:
+                    continue
+            else:
+                continue
+            for a, b in segments:
+                if abs(a.y - b.y) < 1 and abs(a.x - b.x) >= 10:
+                    h.add((round(a.y), round(min(a.x, b.x)), round(max(a.x, b.x))))
+                elif abs(a.x - b.x) < 1 and abs(a.y - b.y) >= 10:
+                    v.add((round(a.x), round(min(a.y, b.y)), round(max(a.y, b.y))))
+    return h, v
+
+def _ruled_grid(h, v):
+    # (column xs, row ys) of the rules that cross a rule running the other way, 2pt tolerance,
+    # or None unless there are TABLE_MIN_RULINGS distinct positions each way
+    rows, cols = set(), set()
+    for y, x0, x1 in h:
+        for x, y0, y1 in v:
+            if x0 - 2 <= x <= x1 + 2 and y0 - 2 <= y <= y1 + 2:
+                rows.add(round(y / 2) * 2)
+                cols.add(round(x / 2) * 2)
+    if len(rows) < TABLE_MIN_RULINGS or len(cols) < TABLE_MIN_RULINGS:
+        return None
+    return sorted(cols), sorted(rows)
+
+def _word_rows(words) -> list:
+    # words grouped into text rows (3pt buckets of the vertical centre), each as (y, [(x0, x1)])
+    rows = {}
+    for x0, y0, x1, y1, *_ in words:
+        rows.setdefault(round((y0 + y1) / 6), []).append((x0, x1))
+    return [(key * 3, spans) for key, spans in rows.items()]
+
+def _text_columns(rows: list):
+    # (aligned columns, share of rows split by wide gaps). A "cell" starts a row or follows a
+    # gap of more than 15pt; columns are cell start positions (5pt buckets) recurring in 3+ rows.
+    # Prose has one or two (margin, indent); tables have one per column.
+    if not rows:
+        return 0, 0.0
+    starts = collections.Counter()
+    split_rows = 0
+    for _, words in rows:
+        words.sort()
+        cells = [words[0][0]] + [b0 for (_, a1), (b0, _) in zip(words, words[1:]) if b0 - a1 > 15]
+        starts.update({round(x / 5) for x in cells})
+        if len(cells) >= 3:
+            split_rows += 1
+    return sum(1 for c in starts.values() if c >= 3), split_rows / len(rows)
+
+def _grid_filled(rows: list, grid) -> bool:
+    # whether at least two text rows inside the grid have words in two or more of its columns
+    xs, ys = grid
+    filled = 0
+    for y, words in rows:
+        if not ys[0] <= y <= ys[-1]:
+            continue
+        cells = {bisect.bisect(xs, (x0 + x1) / 2) for x0, x1 in words if xs[0] <= (x0 + x1) / 2 <= xs[-1]}
+        if len(cells) >= 2:
+            filled += 1
+    return filled >= 2
+
+def _table_score(page: fitz.Page, h, grid) -> int:
+    # Rules alone add at most 1, so a page also needs table-like text to reach TABLE_MIN_SCORE
+    words = page.get_text("words")
+    if not words:
+        return 0  # no text layer: nothing for Camelot to read
+    rows = _word_rows(words)
+    score = 0
+    if grid:
+        score += 1  # ruled grid
+        if _grid_filled(rows, grid):
+            score += 1
+    elif len({y for y, _, _ in h}) >= 3:
+        score += 1  # horizontal rules only (booktabs style)
+    columns, split_share = _text_columns(rows)
+    if columns >= 3:
+        score += 1
+    if columns >= 5:
+        score += 1
+    if split_share >= 0.3:
+        score += 1
+    return score
 
+def _table_page_plan(path: str, prefilter: bool = True) -> dict:
+    # {"lattice": [pages], "stream": [pages], "skipped": [pages]}, 1-based
+    plan = {"lattice": [], "stream": [], "skipped": []}
+    doc = fitz.open(path)
+    try:
+        for n, page in enumerate(doc, start=1):
+            h, v = _page_rulings(page)
+            grid = _ruled_grid(h, v)
+            if prefilter and _table_score(page, h, grid) < TABLE_MIN_SCORE:
+                plan["skipped"].append(n)
+                continue
+            plan["lattice" if grid else "stream"].append(n)
     finally:
-        try:
-            os.remove(path)
-        except:
-            pass
+        doc.close()
+    return plan
 
+def _read_tables(path: str, pages: List[int], flavor: str) -> list:
+    tables = camelot.read_pdf(path, pages=",".join(map(str, pages)), flavor=flavor)
+    found = [(int(t.page), t.df) for t in tables]
+    if flavor == "lattice":
+        empty = sorted(set(pages) - {page for page, _ in found})
+        if empty:
+            found += _read_tables(path, empty, "stream")
+            found.sort(key=lambda t: t[0])  # stable: keeps Camelot's order within a page
+    return found
 
+class TableWriter:
+    # Appends tables to out_path one at a time, so only the current table is held in memory.
+    # xlsx: write-only workbook, one sheet per table (rows go to disk as they are appended)
+    # csv: zip with one CSV per table; parquet: one file of (table_id, page, row, column, value)
+    # rows, a row group per table; json: {"tables": [{"table_id", "page", "rows"}, ...]}
+    def __init__(self, out_path: str, fmt: str):
+        self.out_path = out_path
+        self.fmt = fmt
+        self.count = 0
+        self._sink = None
 
+    def _open(self):
+        if self.fmt == "xlsx":
+            from openpyxl import Workbook
+            self._sink = Workbook(write_only=True)
+        elif self.fmt == "csv":
+            import zipfile
+            self._sink = zipfile.ZipFile(self.out_path, mode="w", compression=zipfile.ZIP_DEFLATED)
+        elif self.fmt == "parquet":
+            schema = pa.schema([("table_id", pa.int32()), ("page", pa.int32()), ("row", pa.int32()),
+                                ("column", pa.int32()), ("value", pa.string())])
+            self._sink = pq.ParquetWriter(self.out_path, schema)
+        else:
+            self._sink = open(self.out_path, "w", encoding="utf-8")
+            self._sink.write('{"tables":[')
 
+    def add(self, page: int, df: pd.DataFrame):
+        if self._sink is None:
+            self._open()
+        self.count += 1
+        n = self.count
+        if self.fmt == "xlsx":
+            ws = self._sink.create_sheet(f"table_{n}")
+            ws.append(list(df.columns))
+            for row in df.itertuples(index=False):
+                ws.append(list(row))
+        elif self.fmt == "csv":
+            self._sink.writestr(f"table_{n}_page_{page}.csv", df.to_csv(index=False, header=False))
+        elif self.fmt == "parquet":
+            values = df.to_numpy()
+            rows, cols = values.shape
+            self._sink.write_table(pa.table({
+                "table_id": pa.array([n] * (rows * cols), pa.int32()),
+                "page": pa.array([page] * (rows * cols), pa.int32()),
+                "row": pa.array([r for r in range(rows) for _ in range(cols)], pa.int32()),
+                "column": pa.array(list(range(cols)) * rows, pa.int32()),
+                "value": pa.array([str(v) for v in values.ravel()], pa.string()),
+            }))
+        else:
+            if n > 1:
+                self._sink.write(",")
+            json.dump({"table_id": n, "page": page, "rows": df.astype(str).values.tolist()}, self._sink, ensure_ascii=False)
 
-# 3. PDF -> JPG (export each page as JPG, return zip if multiple)
-@app.post("/convert/pdf-to-jpg")
-async def pdf_to_jpg(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
-    images = convert_from_path(path, dpi=200)
-    # If single page return single jpg, else create zip
-    if len(images) == 1:
-        buf = io.BytesIO()
-        images[0].save(buf, format="JPEG")
-        buf.seek(0)
-        return StreamingResponse(buf, media_type="image/jpeg", headers={"Content-Disposition": "attachment; filename=page1.jpg"})
-    else:
-        import zipfile
-        zip_buf = io.BytesIO()
-        with zipfile.ZipFile(zip_buf, mode="w") as zf:
-            for i, img in enumerate(images, start=1):
-                b = io.BytesIO()
-                img.save(b, format="JPEG")
-                b.seek(0)
-                zf.writestr(f"page_{i}.jpg", b.read())
-        zip_buf.seek(0)
-        return StreamingResponse(zip_buf, media_type="application/zip", headers={"Content-Disposition": "attachment; filename=pages.zip"})
-    # cleanup
-    try: os.remove(path)
-    except: pass
+    def extend(self, tables: list):
+        for page, df in tables:
+            self.add(page, df)
 
-# 4. JPG -> PDF
-@app.post("/convert/jpg-to-pdf")
-async def jpg_to_pdf(files: List[UploadFile] = File(...)):
-    images = []
-    paths = []
-    for f in files:
-        p = save_uploadfile_tmp(f)
-        paths.append(p)
-        images.append(Image.open(p).convert("RGB"))
-    out_path = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    images[0].save(out_path, save_all=True, append_images=images[1:])
-    for p in paths:
-        try: os.remove(p)
-        except: pass
-    return StreamingResponse(open(out_path, "rb"), media_type="application/pdf", headers={"Content-Disposition": "attachment; filename=converted.pdf"})
+    def close(self):
+        if self._sink is None:
+            return
+        if self.fmt == "xlsx":
+            self._sink.save(self.out_path)
+        else:
+            if self.fmt == "json":
+                self._sink.write("]}")
+            self._sink.close()
+        self._sink = None
+
+async def _stream_tables(path: str, plan: dict, out_path: str, fmt: str, prefetch: Optional[int], progress) -> int:
+    # Chunks are runs of consecutive planned pages sharing a flavor. They come back from the
+    # render pool in page order; each is written on an assemble thread as it arrives while
+    # the next ones are still being parsed
+    flavors = {n: flavor for flavor in ("lattice", "stream") for n in plan[flavor]}
+    size = max(1, TABLE_CHUNK_PAGES)
+    groups = []
+    for n in sorted(flavors):
+        if groups and groups[-1][1] == flavors[n] and len(groups[-1][0]) < size:
+            groups[-1][0].append(n)
+        else:
+            groups.append(([n], flavors[n]))
+    chunks = iter(groups)
+    total = sum(len(pages) for pages in plan.values())
+    writer = TableWriter(out_path, fmt)
+    try:
+        results = aiter_in_pool("render", _read_tables, [(path, g, flavor) for g, flavor in groups], prefetch)
+        async with contextlib.aclosing(results):
+            async for tables in results:
+                if tables:
+                    await run_in_pool("assemble", writer.extend, tables)
+                if progress:
+                    progress(len(next(chunks)[0]), total)
+    finally:
+        await run_in_pool("assemble", writer.close)
+    return writer.count
+
+async def extract_tables(path: str, out_path: str, fmt: str = "xlsx", concurrency: Optional[int] = None, progress=None,
+                         prefilter: bool = True) -> int:
+    if fmt not in TABLE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(TABLE_FORMATS)}")
+    if fmt == "parquet" and pq is None:
+        raise HTTPException(status_code=400, detail="parquet output needs pyarrow installed")
+    plan = await run_in_pool("assemble", _table_page_plan, path, prefilter)
+    if progress:
+        progress(len(plan["skipped"]), sum(len(pages) for pages in plan.values()))
+    try:
+        with stage("convert", "camelot"):
+            return await _stream_tables(path, plan, out_path, fmt, concurrency, progress)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Camelot error: {e}")
+
+def _table_params(fmt: str, prefilter: bool) -> dict:
+    # validates the output options and returns the cache parameters (shared with jobs)
+    if fmt not in TABLE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(TABLE_FORMATS)}")
+    if fmt == "parquet" and pq is None:
+        raise HTTPException(status_code=400, detail="parquet output needs pyarrow installed")
+    params = {} if prefilter else {"prefilter": False}
+    if fmt != "xlsx":
+        params["format"] = fmt
+    return params
 
-# 5. PDF -> Excel (Camelot)
 @app.post("/convert/pdf-to-excel")
-async def pdf_to_excel(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
+async def pdf_to_excel(file: UploadFile = File(...), concurrency: Optional[int] = Form(None), prefilter: bool = Form(True),
+                       format: str = Form("xlsx")):
+    # prefilter=false sends every page to Camelot instead of only likely table pages
+    fmt = format.lower()
+    params = _table_params(fmt, prefilter)
+    media_type, filename = TABLE_FORMATS[fmt]
+    key = ResultCache.make_key("pdf-to-excel", await run_in_pool("fitz", upload_digest, file), params)
+    hit = await cached_response(key, media_type, filename)
+    if hit:
+        return hit
+    path = await run_in_pool("fitz", save_uploadfile_tmp, file)
+    out_path = temp_path(os.path.splitext(filename)[1])
     try:
-        # Camelot: 'lattice' or 'stream' detection; try both
-        tables = []
-        try:
-            tables = camelot.read_pdf(path, pages='all', flavor='lattice')
-            if len(tables) == 0:
-                tables = camelot.read_pdf(path, pages='all', flavor='stream')
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Camelot error: {e}")
-        if len(tables) == 0:
+        count = await extract_tables(path, out_path, fmt, concurrency, prefilter=prefilter)
+        if count == 0:
             raise HTTPException(status_code=404, detail="No tables found")
-        out = tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False)
-        out_path = out.name
-        out.close()
-        with pd.ExcelWriter(out_path, engine="openpyxl") as writer:
-            for i, t in enumerate(tables, start=1):
-                df = t.df
-                df.to_excel(writer, sheet_name=f"table_{i}", index=False)
-        return StreamingResponse(open(out_path, "rb"), media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                 headers={"Content-Disposition": f"attachment; filename={os.path.basename(out_path)}"})
+        await run_in_pool("fitz", result_cache.put_file, key, out_path)
+    except BaseException:
+        remove_paths(out_path)
+        raise
     finally:
-        try: os.remove(path)
-        except: pass
+        remove_paths(path)
+    return file_response(out_path, media_type, filename if fmt != "xlsx" else os.path.basename(out_path))
 
 # 6. Excel -> PDF (libreoffice)
 @app.post("/convert/excel-to-pdf")
 async def excel_to_pdf(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
-    tmp_dir = tempfile.mkdtemp()
+    return await office_to_pdf_response(file, "calc_pdf_Export")
+
+# --- Page Manipulation Tools (using PyMuPDF / pypdf or fitz) ---
+# Merging keeps memory flat through checkpoint_pdf. One final save then garbage-collects and
+# compresses the whole file; garbage=3 merges duplicate objects, garbage=4 also finds identical
+# streams (fonts, images) repeated across inputs. Merges run on the assemble pool, since one
+# with hundreds of inputs would otherwise hold a fitz thread the light tools need.
+
+def merge_pdf_files(sources: list, out_path: str, garbage: int = 3, deflate: bool = True, progress=None):
+    # sources: file paths or UploadFiles, merged in order; progress(1, len(sources)) per input
+    flush_every = max(1, MERGE_FLUSH_EVERY)
+    work_path = temp_path(".pdf")
+    doc = fitz.open()
     try:
-        subprocess.run(["libreoffice", "--headless", "--convert-to", "pdf", "--outdir", tmp_dir, path], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        base = os.path.splitext(os.path.basename(path))[0] + ".pdf"
-        pdf_path = os.path.join(tmp_dir, base)
-        if not os.path.exists(pdf_path):
-            raise HTTPException(status_code=500, detail="Conversion failed")
-        return StreamingResponse(open(pdf_path, "rb"), media_type="application/pdf",
-                                 headers={"Content-Disposition": f"attachment; filename={base}"})
+        for i, source in enumerate(sources, start=1):
+            if isinstance(source, str):
+                with stage("open"):
+                    src = fitz.open(source, filetype="pdf")
+            else:
+                src = open_upload_pdf(source)
+            try:
+                doc.insert_pdf(src)
+            finally:
+                src.close()
+            if i % flush_every == 0 and i < len(sources):
+                doc = checkpoint_pdf(doc, work_path)
+            if progress:
+                progress(1, len(sources))
+        with stage("encode"):
+            doc.save(out_path, garbage=garbage, deflate=deflate)
     finally:
-        try: os.remove(path)
-        except: pass
+        doc.close()
+        remove_paths(work_path, work_path + ".new")
+
+def _merge_params(garbage: int, deflate: bool) -> dict:
+    if not 0 <= garbage <= 4:
+        raise HTTPException(status_code=400, detail="garbage must be between 0 and 4")
+    return {"garbage": garbage, "deflate": deflate}
 
-# --- Page Manipulation Tools (using PyMuPDF / pypdf or fitz) ---
 @app.post("/tools/merge")
-async def merge_pdfs(files: List[UploadFile] = File(...)):
-    out_path = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    doc = fitz.open()
-    for f in files:
-        p = save_uploadfile_tmp(f)
-        src = fitz.open(p)
-        doc.insert_pdf(src)
-        src.close()
-        try: os.remove(p)
-        except: pass
-    doc.save(out_path)
-    doc.close()
-    return StreamingResponse(open(out_path, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=merged.pdf"})
+async def merge_pdfs(files: List[UploadFile] = File(...), garbage: int = Form(3), deflate: bool = Form(True)):
+    _merge_params(garbage, deflate)
+    out_path = temp_path(".pdf")
+    try:
+        await run_in_pool("assemble", merge_pdf_files, files, out_path, garbage, deflate)
+    except BaseException:
+        remove_paths(out_path)
+        raise
+    return file_response(out_path, "application/pdf", "merged.pdf")
+
+def _split_parts(doc: fitz.Document, every: int, by: str, level: int) -> list:
+    # -> [(arcname, first, last)] with 1-based inclusive page numbers
+    page_count = doc.page_count
+    if by == "pages":
+        if every == 1:
+            return [(f"page_{n}.pdf", n, n) for n in range(1, page_count + 1)]
+        return [(f"pages_{a}-{b}.pdf", a, b) for a, b in page_chunks(page_count, every)]
+    # by bookmark: each bookmark at or above `level` starts a part that runs to the next one
+    starts = {}
+    for lvl, title, page in doc.get_toc(simple=True):
+        if lvl <= level and 1 <= page <= page_count and page not in starts:
+            starts[page] = title
+    if not starts:
+        return []
+    pages = sorted(starts)
+    if pages[0] > 1:
+        pages.insert(0, 1)
+        starts[1] = "front matter"
+    parts = []
+    for i, first in enumerate(pages):
+        last = pages[i + 1] - 1 if i + 1 < len(pages) else page_count
+        title = re.sub(r"[^\w\- ]+", "", starts[first]).strip()[:60] or "section"
+        parts.append((f"{i + 1:03d}_{title}.pdf", first, last))
+    return parts
+
+def _split_zip_stream(doc: fitz.Document, parts: list):
+    # Each part is copied into its own document, serialized with tobytes() and flushed into the
+    # zip stream before the next one is built. doc is closed once the stream is done.
+    def entries():
+        for name, first, last in parts:
+            new = fitz.open()
+            new.insert_pdf(doc, from_page=first - 1, to_page=last - 1)
+            data = pdf_bytes(new, garbage=1)
+            new.close()
+            yield name, data
+
+    try:
+        yield from iter_zip(entries())
+    finally:
+        doc.close()
 
 @app.post("/tools/split")
-async def split_pdf(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
-    doc = fitz.open(path)
-    out_files = []
-    for i in range(doc.page_count):
-        new = fitz.open()
-        new.insert_pdf(doc, from_page=i, to_page=i)
-        fpath = tempfile.NamedTemporaryFile(suffix=f"_page_{i+1}.pdf", delete=False).name
-        new.save(fpath)
-        new.close()
-        out_files.append(fpath)
-    doc.close()
-    # return zip
-    import zipfile, io
-    zip_buf = io.BytesIO()
-    with zipfile.ZipFile(zip_buf, mode="w") as zf:
-        for p in out_files:
-            zf.write(p, arcname=os.path.basename(p))
-    zip_buf.seek(0)
-    # cleanup
-    try: os.remove(path)
-    except: pass
-    for p in out_files:
-        try: os.remove(p)
-        except: pass
-    return StreamingResponse(zip_buf, media_type="application/zip", headers={"Content-Disposition":"attachment; filename=pages.zip"})
+async def split_pdf(file: UploadFile = File(...), every: int = Form(1), by: str = Form("pages"), level: int = Form(1)):
+    # by="pages": one part per `every` pages; by="bookmarks": one part per bookmark of level <= `level`
+    if every < 1:
+        raise HTTPException(status_code=400, detail="every must be at least 1")
+    if by not in ("pages", "bookmarks"):
+        raise HTTPException(status_code=400, detail="by must be pages or bookmarks")
+    # the document is opened from the upload's own spool (see open_upload_pdf) and stays
+    # readable after the request closes the upload, so the zip stream can keep using it
+    doc = await run_in_pool("fitz", open_upload_pdf, file)
+    streaming = False
+    try:
+        parts = await run_in_pool("fitz", _split_parts, doc, every, by, level)
+        if not parts:
+            raise HTTPException(status_code=400, detail="PDF has no bookmarks to split on" if by == "bookmarks" else "PDF has no pages")
+        streaming = True
+        return StreamingResponse(_split_zip_stream(doc, parts), media_type="application/zip", headers=attachment("pages.zip"))
+    finally:
+        # the zip stream closes the document itself once it has been sent
+        if not streaming:
+            doc.close()
 
 class PagesModel(BaseModel):
     pages: List[int]
 
-@app.post("/tools/extract")
-async def extract_pages(file: UploadFile = File(...), pages: str = Form(...)):
-    # pages form: comma-separated pages e.g. "1,3,5-7"
-    path = save_uploadfile_tmp(file)
-    doc = fitz.open(path)
+# Page operations work on an open document and return the document to continue with (a new
+# one for extract/reorder, which close the old). The single-purpose endpoints and
+# /tools/pipeline all go through apply_page_operations, so the upload is parsed and
+# serialized once however many operations are applied.
+def apply_page_operations(upload_file: UploadFile, steps: list) -> bytes:
+    # steps: [(operation, keyword arguments)]
+    doc = open_upload_pdf(upload_file)
+    try:
+        for i, (op, params) in enumerate(steps, start=1):
+            try:
+                doc = op(doc, **params)
+            except (TypeError, ValueError, IndexError) as e:
+                detail = f"Operation {i} failed: {e}" if len(steps) > 1 else str(e)
+                raise HTTPException(status_code=400, detail=detail)
+        return pdf_bytes(doc)
+    finally:
+        doc.close()
+
+def _extract_pages(doc: fitz.Document, pages: str) -> fitz.Document:
     sel = parse_page_ranges(pages, doc.page_count)
     new = fitz.open()
     for p in sel:
         new.insert_pdf(doc, from_page=p-1, to_page=p-1)
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    new.save(out)
-    new.close(); doc.close()
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition": "attachment; filename=extracted.pdf"})
+    doc.close()
+    return new
 
-@app.post("/tools/delete-pages")
-async def delete_pages(file: UploadFile = File(...), pages: str = Form(...)):
-    path = save_uploadfile_tmp(file)
-    doc = fitz.open(path)
+@app.post("/tools/extract")
+async def extract_pages(file: UploadFile = File(...), pages: str = Form(...)):
+    # pages form: comma-separated pages e.g. "1,3,5-7"
+    data = await run_in_pool("fitz", apply_page_operations, file, [(_extract_pages, {"pages": pages})])
+    return bytes_response(data, "application/pdf", "extracted.pdf")
+
+def _delete_pages(doc: fitz.Document, pages: str) -> fitz.Document:
     sel = parse_page_ranges(pages, doc.page_count)
     # Remove selected pages (work from end to start)
     for p in sorted(sel, reverse=True):
         doc.delete_page(p-1)
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    doc.save(out); doc.close()
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=updated.pdf"})
+    return doc
 
-@app.post("/tools/reorder")
-async def reorder_pages(file: UploadFile = File(...), order: str = Form(...)):
-    # order e.g. "2,1,3,5,4"
-    path = save_uploadfile_tmp(file)
-    doc = fitz.open(path)
+@app.post("/tools/delete-pages")
+async def delete_pages(file: UploadFile = File(...), pages: str = Form(...)):
+    data = await run_in_pool("fitz", apply_page_operations, file, [(_delete_pages, {"pages": pages})])
+    return bytes_response(data, "application/pdf", "updated.pdf")
+
+def _reorder_pages(doc: fitz.Document, order: str) -> fitz.Document:
     order_list = [int(x) for x in order.split(",")]
     new = fitz.open()
     for p in order_list:
         new.insert_pdf(doc, from_page=p-1, to_page=p-1)
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    new.save(out); new.close(); doc.close()
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=reordered.pdf"})
+    doc.close()
+    return new
 
-@app.post("/tools/rotate")
-async def rotate_pages(file: UploadFile = File(...), page: int = Form(...), degrees: int = Form(...)):
-    path = save_uploadfile_tmp(file)
-    doc = fitz.open(path)
+@app.post("/tools/reorder")
+async def reorder_pages(file: UploadFile = File(...), order: str = Form(...)):
+    # order e.g. "2,1,3,5,4"
+    data = await run_in_pool("fitz", apply_page_operations, file, [(_reorder_pages, {"order": order})])
+    return bytes_response(data, "application/pdf", "reordered.pdf")
+
+def _rotate_page(doc: fitz.Document, page: int, degrees: int) -> fitz.Document:
     page_obj = doc.load_page(page-1)
     page_obj.set_rotation(degrees)
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    doc.save(out); doc.close()
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=rotated.pdf"})
+    return doc
+
+@app.post("/tools/rotate")
+async def rotate_pages(file: UploadFile = File(...), page: int = Form(...), degrees: int = Form(...)):
+    data = await run_in_pool("fitz", apply_page_operations, file, [(_rotate_page, {"page": page, "degrees": degrees})])
+    return bytes_response(data, "application/pdf", "rotated.pdf")
 
 # Utilities
 def parse_page_ranges(s: str, max_page: int):
@@ -323,161 +1923,924 @@ def parse_page_ranges(s: str, max_page: int):
     pages = [p for p in pages if 1 <= p <= max_page]
     return sorted(set(pages))
 
+def page_chunks(page_count: int, size: int):
+    # Split pages 1..page_count into consecutive (first, last) ranges of at most `size` pages
+    size = max(1, size)
+    return [(a, min(a + size - 1, page_count)) for a in range(1, page_count + 1, size)]
+
+class ZipStream(io.RawIOBase):
+    # Write-only sink for zipfile that hands back whatever was written since the last drain()
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_zip(entries):
+    # Stream a ZIP archive: each (arcname, data) entry is yielded as soon as it is written
+    import zipfile
+    sink = ZipStream()
+    with zipfile.ZipFile(sink, mode="w") as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+            yield sink.drain()
+    yield sink.drain()
+
+def pdf_page_count(path: str) -> int:
+    with stage("open"):
+        doc = fitz.open(path)
+    try:
+        record_pages(doc.page_count)
+        return doc.page_count
+    finally:
+        doc.close()
+
 # 13. Add Text Watermark
-@app.post("/tools/watermark-text")
-async def watermark_text(file: UploadFile = File(...), text: str = Form(...), fontsize: int = Form(36)):
-    path = save_uploadfile_tmp(file)
-    doc = fitz.open(path)
+def _watermark_text(doc: fitz.Document, text: str, fontsize: int = 36) -> fitz.Document:
     for page in doc:
         rect = page.rect
         page.insert_text((rect.width/4, rect.height/2), text, fontsize=fontsize, rotate=45, render_mode=3, color=(0.5,0.5,0.5))
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    doc.save(out); doc.close()
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=watermarked.pdf"})
+    return doc
+
+@app.post("/tools/watermark-text")
+async def watermark_text(file: UploadFile = File(...), text: str = Form(...), fontsize: int = Form(36)):
+    data = await run_in_pool("fitz", apply_page_operations, file, [(_watermark_text, {"text": text, "fontsize": fontsize})])
+    return bytes_response(data, "application/pdf", "watermarked.pdf")
 
 # 14. Add Page Numbers
-@app.post("/tools/add-page-numbers")
-async def add_page_numbers(file: UploadFile = File(...), start: int = Form(1)):
-    path = save_uploadfile_tmp(file)
-    doc = fitz.open(path)
+def _add_page_numbers(doc: fitz.Document, start: int = 1) -> fitz.Document:
     for i, page in enumerate(doc, start=start):
         page.insert_text((page.rect.width - 50, page.rect.height - 30), str(i), fontsize=12)
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    doc.save(out); doc.close()
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=with-pagenumbers.pdf"})
+    return doc
+
+@app.post("/tools/add-page-numbers")
+async def add_page_numbers(file: UploadFile = File(...), start: int = Form(1)):
+    data = await run_in_pool("fitz", apply_page_operations, file, [(_add_page_numbers, {"start": start})])
+    return bytes_response(data, "application/pdf", "with-pagenumbers.pdf")
 
 # 15. PDF Editing (add text) (same as edit/add-text)
-@app.post("/tools/edit/add-text")
-async def add_text(file: UploadFile = File(...), page: int = Form(...), x: float = Form(...), y: float = Form(...), text: str = Form(...), fontsize: int = Form(12)):
-    path = save_uploadfile_tmp(file)
-    doc = fitz.open(path)
+def _add_text(doc: fitz.Document, page: int, x: float, y: float, text: str, fontsize: int = 12) -> fitz.Document:
     p = doc.load_page(page-1)
     p.insert_text((x,y), text, fontsize=fontsize)
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    doc.save(out); doc.close()
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=edited.pdf"})
+    return doc
+
+@app.post("/tools/edit/add-text")
+async def add_text(file: UploadFile = File(...), page: int = Form(...), x: float = Form(...), y: float = Form(...), text: str = Form(...), fontsize: int = Form(12)):
+    data = await run_in_pool("fitz", apply_page_operations, file, [(_add_text, {"page": page, "x": x, "y": y, "text": text, "fontsize": fontsize})])
+    return bytes_response(data, "application/pdf", "edited.pdf")
+
+# 15a. Page operation pipeline: several edits, one upload, one save
+def _page_list_field(value) -> str:
+    # "1,3,5-7", 3 or [1, 3, "5-7"] -> the comma-separated form the form fields use
+    if isinstance(value, list) and value:
+        return ",".join(_page_list_field(v) for v in value)
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        raise ValueError("expected page numbers as a string, a number or a list")
+    return str(value)
+
+def _bool_field(value) -> bool:
+    # JSON booleans, or the strings form fields accept
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ("true", "1", "yes", "on", "false", "0", "no", "off"):
+        return value.lower() in ("true", "1", "yes", "on")
+    raise ValueError("expected true or false")
+
+def _int_field(value) -> int:
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError("expected an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("expected an integer")
+
+def _float_field(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError("expected a number")
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError("expected a number")
+
+def _text_field(value) -> str:
+    if not isinstance(value, str):
+        raise ValueError("expected a string")
+    return value
+
+# pipeline step field -> converter to the type the endpoint's form field has
+PAGE_OPERATION_FIELDS = {
+    "pages": _page_list_field,
+    "order": _page_list_field,
+    "page": _int_field,
+    "degrees": _int_field,
+    "start": _int_field,
+    "fontsize": _int_field,
+    "x": _float_field,
+    "y": _float_field,
+    "text": _text_field,
+}
+
+PAGE_OPERATIONS = {
+    "extract": _extract_pages,
+    "delete-pages": _delete_pages,
+    "reorder": _reorder_pages,
+    "rotate": _rotate_page,
+    "watermark-text": _watermark_text,
+    "add-page-numbers": _add_page_numbers,
+    "add-text": _add_text,
+}
+
+@app.post("/tools/pipeline")
+async def page_pipeline(file: UploadFile = File(...), operations: str = Form(...)):
+    # operations: JSON list applied in order, each with the same fields as the matching endpoint, e.g.
+    # [{"op": "delete-pages", "pages": "2"}, {"op": "rotate", "page": 1, "degrees": 90}, {"op": "add-page-numbers"}]
+    # pages/order may also be given as a number or a list, e.g. {"op": "reorder", "order": [2, 1]}
+    try:
+        ops = json.loads(operations)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="operations must be a JSON list")
+    if not isinstance(ops, list) or not ops:
+        raise HTTPException(status_code=400, detail="operations must be a non-empty JSON list")
+    steps = []
+    for i, op in enumerate(ops, start=1):
+        if not isinstance(op, dict) or op.get("op") not in PAGE_OPERATIONS:
+            raise HTTPException(status_code=400, detail=f"Operation {i}: op must be one of {', '.join(PAGE_OPERATIONS)}")
+        params = {}
+        for field, value in op.items():
+            if field == "op":
+                continue
+            convert = PAGE_OPERATION_FIELDS.get(field)
+            if convert is None:
+                raise HTTPException(status_code=400, detail=f"Operation {i} ({op['op']}): unknown field {field}")
+            try:
+                params[field] = convert(value)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"Operation {i} ({op['op']}): {field}: {e}")
+        steps.append((PAGE_OPERATIONS[op["op"]], params))
+    data = await run_in_pool("fitz", apply_page_operations, file, steps)
+    return bytes_response(data, "application/pdf", "edited.pdf")
 
 # 16. Protect PDF (password)
-@app.post("/tools/protect")
-async def protect_pdf(file: UploadFile = File(...), password: str = Form(...)):
-    path = save_uploadfile_tmp(file)
-    doc = fitz.open(path)
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
+def _protect(upload_file: UploadFile, password: str) -> bytes:
+    doc = open_upload_pdf(upload_file)
     # PyMuPDF supports encryption via saveAs
-    doc.save(out, encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw=password, user_pw=password)
+    data = pdf_bytes(doc, encryption=fitz.PDF_ENCRYPT_AES_256, owner_pw=password, user_pw=password)
     doc.close()
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=protected.pdf"})
+    return data
+
+@app.post("/tools/protect")
+async def protect_pdf(file: UploadFile = File(...), password: str = Form(...)):
+    data = await run_in_pool("fitz", _protect, file, password)
+    return bytes_response(data, "application/pdf", "protected.pdf")
 
 # 17. Unlock PDF (remove password)
-@app.post("/tools/unlock")
-async def unlock_pdf(file: UploadFile = File(...), password: str = Form(...)):
-    path = save_uploadfile_tmp(file)
-    try:
-        doc = fitz.open(path, filetype="pdf", password=password)
-    except Exception as e:
+def _unlock(upload_file: UploadFile, password: str) -> bytes:
+    doc = open_upload_pdf(upload_file)
+    if doc.needs_pass and not doc.authenticate(password):
+        doc.close()
         raise HTTPException(status_code=401, detail="Wrong password")
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    doc.save(out)
+    data = pdf_bytes(doc)
     doc.close()
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=unlocked.pdf"})
+    return data
+
+@app.post("/tools/unlock")
+async def unlock_pdf(file: UploadFile = File(...), password: str = Form(...)):
+    data = await run_in_pool("fitz", _unlock, file, password)
+    return bytes_response(data, "application/pdf", "unlocked.pdf")
 
 # 18. Repair PDF (Ghostscript fix)
+def _run_ghostscript(args: List[str]):
+    subprocess.run(["gs"] + args, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
 @app.post("/tools/repair")
 async def repair_pdf(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
-    out_path = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
+    key = ResultCache.make_key("repair", await run_in_pool("fitz", upload_digest, file))
+    hit = await cached_response(key, "application/pdf", "repaired.pdf")
+    if hit:
+        return hit
+    path = await run_in_pool("fitz", save_uploadfile_tmp, file)
+    out_path = temp_path(".pdf")
     try:
-        subprocess.run(["gs", "-o", out_path, "-sDEVICE=pdfwrite", "-dPDFSETTINGS=/prepress", path], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with stage("convert", "ghostscript"):
+            await run_in_pool("subprocess", _run_ghostscript, ["-o", out_path, "-sDEVICE=pdfwrite", "-dPDFSETTINGS=/prepress", path])
+        await run_in_pool("fitz", result_cache.put_file, key, out_path)
     except subprocess.CalledProcessError as e:
+        remove_paths(out_path)
         raise HTTPException(status_code=500, detail=f"Ghostscript failed: {e}")
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out_path, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=repaired.pdf"})
+    except BaseException:
+        remove_paths(out_path)
+        raise
+    finally:
+        remove_paths(path)
+    return file_response(out_path, "application/pdf", "repaired.pdf")
 
 # 19. Convert to PDF/A
 @app.post("/tools/pdfa")
 async def pdf_to_pdfa(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
-    out_path = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
+    key = ResultCache.make_key("pdfa", await run_in_pool("fitz", upload_digest, file))
+    hit = await cached_response(key, "application/pdf", "pdfa.pdf")
+    if hit:
+        return hit
+    path = await run_in_pool("fitz", save_uploadfile_tmp, file)
+    out_path = temp_path(".pdf")
     try:
-        subprocess.run(["gs", "-dPDFA=2", "-dBATCH", "-dNOPAUSE", "-sProcessColorModel=DeviceCMYK", "-sDEVICE=pdfwrite", f"-sOutputFile={out_path}", path], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        with stage("convert", "ghostscript"):
+            await run_in_pool("subprocess", _run_ghostscript, ["-dPDFA=2", "-dBATCH", "-dNOPAUSE", "-sProcessColorModel=DeviceCMYK", "-sDEVICE=pdfwrite", f"-sOutputFile={out_path}", path])
+        await run_in_pool("fitz", result_cache.put_file, key, out_path)
     except subprocess.CalledProcessError as e:
+        remove_paths(out_path)
         raise HTTPException(status_code=500, detail=f"Ghostscript failed: {e}")
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out_path, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=pdfa.pdf"})
+    except BaseException:
+        remove_paths(out_path)
+        raise
+    finally:
+        remove_paths(path)
+    return file_response(out_path, "application/pdf", "pdfa.pdf")
 
 # 20. OCR PDF -> Text
+OCR_CHUNK_PAGES = _env_int("OCR_CHUNK_PAGES", 4)
+OCR_DPI = 200
+# format -> (media type, download name). Every format comes from a single Tesseract run per page:
+#   text  {"text": ...} (image_to_string)
+#   json  per-page text plus word boxes in pixels at OCR_DPI and confidences (image_to_data)
+#   hocr, alto  one merged document for all pages
+#   pdf   the original PDF with an invisible text layer laid over each page (searchable)
+OCR_FORMATS = {
+    "text": ("application/json", "ocr.json"),
+    "json": ("application/json", "ocr.json"),
+    "hocr": ("text/html", "ocr.hocr"),
+    "alto": ("application/xml", "ocr.xml"),
+    "pdf": ("application/pdf", "ocr.pdf"),
+}
+
+def _ocr_image(img: Image.Image, fmt: str):
+    if fmt == "text":
+        return pytesseract.image_to_string(img)
+    if fmt == "json":
+        d = pytesseract.image_to_data(img, output_type=pytesseract.Output.DICT)
+        words, lines = [], {}
+        for i, word in enumerate(d["text"]):
+            if not word.strip():
+                continue
+            words.append({"text": word, "conf": float(d["conf"][i]),
+                          "left": d["left"][i], "top": d["top"][i], "width": d["width"][i], "height": d["height"][i],
+                          "block": d["block_num"][i], "line": d["line_num"][i]})
+            lines.setdefault((d["block_num"][i], d["par_num"][i], d["line_num"][i]), []).append(word)
+        text = "\n".join(" ".join(line) for line in lines.values())
+        return {"width": img.width, "height": img.height, "text": text, "words": words}
+    if fmt == "hocr":
+        return pytesseract.image_to_pdf_or_hocr(img, extension="hocr").decode("utf-8")
+    if fmt == "alto":
+        out = pytesseract.image_to_alto_xml(img)
+        return out.decode("utf-8") if isinstance(out, bytes) else out
+    # text-only page: laid over the original page rather than replacing it with a raster
+    return pytesseract.image_to_pdf_or_hocr(img, extension="pdf", config="-c textonly_pdf=1")
+
+def _ocr_pages(path: str, pages: List[int], dpi: int, fmt: str = "text") -> list:
+    # Each render worker rasterizes and recognizes only its own pages (1-based)
+    return [_ocr_image(img, fmt) for img in render_pages(path, pages, dpi)]
+
+# Hybrid mode: pages that already carry a text layer are read with fitz instead of being
+# rasterized and OCRed. A page goes to Tesseract when it has fewer than OCR_MIN_TEXT_CHARS
+# characters, or when images cover more than OCR_MAX_IMAGE_COVERAGE of it and its text is
+# still sparse (a scan with a stamped header, say).
+OCR_MIN_TEXT_CHARS = _env_int("OCR_MIN_TEXT_CHARS", 50)
+OCR_MAX_IMAGE_COVERAGE = 0.5
+
+def _needs_ocr(page: fitz.Page, text: str) -> bool:
+    chars = len("".join(text.split()))
+    if chars < OCR_MIN_TEXT_CHARS:
+        return True
+    area = abs(page.rect) or 1
+    covered = sum(abs(fitz.Rect(info["bbox"]) & page.rect) for info in page.get_image_info())
+    return covered / area > OCR_MAX_IMAGE_COVERAGE and chars < 10 * OCR_MIN_TEXT_CHARS
+
+def _text_layer_lines(page: fitz.Page, scale: float) -> dict:
+    # {(block, line): [(x0, y0, x1, y1, word)]} in pixels at the OCR resolution, reading order
+    lines = {}
+    for x0, y0, x1, y1, word, block, line, _ in page.get_text("words", sort=True):
+        lines.setdefault((block, line), []).append((round(x0 * scale), round(y0 * scale), round(x1 * scale), round(y1 * scale), word))
+    return lines
+
+def _text_layer_result(page: fitz.Page, text: str, fmt: str, dpi: int):
+    # The same shape _ocr_image produces for `fmt`, built from the page's own text
+    if fmt == "text":
+        return text
+    if fmt == "pdf":
+        return None  # already searchable: nothing to lay over it
+    scale = dpi / 72
+    width, height = round(page.rect.width * scale), round(page.rect.height * scale)
+    lines = _text_layer_lines(page, scale)
+    if fmt == "json":
+        words = [{"text": w, "conf": 100.0, "left": x0, "top": y0, "width": x1 - x0, "height": y1 - y0, "block": b, "line": l}
+                 for (b, l), ws in lines.items() for x0, y0, x1, y1, w in ws]
+        return {"width": width, "height": height, "text": "\n".join(" ".join(w[4] for w in ws) for ws in lines.values()),
+                "words": words, "source": "text-layer"}
+
+    def bbox(ws):
+        return min(w[0] for w in ws), min(w[1] for w in ws), max(w[2] for w in ws), max(w[3] for w in ws)
+
+    if fmt == "hocr":
+        out = ['<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"'
+               ' "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">\n<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">\n'
+               ' <head>\n  <title></title>\n  <meta http-equiv="Content-Type" content="text/html;charset=utf-8"/>\n'
+               "  <meta name='ocr-capabilities' content='ocr_page ocr_line ocrx_word'/>\n </head>\n<body>\n",
+               f"  <div class='ocr_page' id='page_1' title='bbox 0 0 {width} {height}; ppageno 0; scan_res {dpi} {dpi}'>\n"]
+        n = 0
+        for i, ws in enumerate(lines.values(), start=1):
+            out.append("   <span class='ocr_line' id='line_1_%d' title='bbox %d %d %d %d'>" % ((i,) + bbox(ws)))
+            for x0, y0, x1, y1, w in ws:
+                n += 1
+                out.append(f"<span class='ocrx_word' id='word_1_{n}' title='bbox {x0} {y0} {x1} {y1}; x_wconf 100'>{escape(w)}</span> ")
+            out.append("</span>\n")
+        out.append("  </div>\n</body>\n</html>\n")
+        return "".join(out)
+    # alto
+    out = ['<?xml version="1.0" encoding="UTF-8"?>\n<alto xmlns="http://www.loc.gov/standards/alto/ns-v3#">\n'
+           " <Description><MeasurementUnit>pixel</MeasurementUnit></Description>\n <Layout>\n",
+           f'  <Page WIDTH="{width}" HEIGHT="{height}" PHYSICAL_IMG_NR="0" ID="page_0">\n'
+           f'   <PrintSpace HPOS="0" VPOS="0" WIDTH="{width}" HEIGHT="{height}">\n']
+    blocks = {}
+    for (b, _), ws in lines.items():
+        blocks.setdefault(b, []).append(ws)
+    n = 0
+    for b, block_lines in blocks.items():
+        x0, y0, x1, y1 = bbox([w for ws in block_lines for w in ws])
+        out.append(f'    <TextBlock ID="block_{b}" HPOS="{x0}" VPOS="{y0}" WIDTH="{x1 - x0}" HEIGHT="{y1 - y0}">\n')
+        for ws in block_lines:
+            x0, y0, x1, y1 = bbox(ws)
+            out.append(f'     <TextLine ID="line_{n}" HPOS="{x0}" VPOS="{y0}" WIDTH="{x1 - x0}" HEIGHT="{y1 - y0}">')
+            out.append("<SP/>".join(f'<String ID="string_{n}_{i}" HPOS="{wx0}" VPOS="{wy0}" WIDTH="{wx1 - wx0}" HEIGHT="{wy1 - wy0}" WC="1.0" CONTENT={quoteattr(w)}/>'
+                                    for i, (wx0, wy0, wx1, wy1, w) in enumerate(ws)))
+            out.append("</TextLine>\n")
+            n += 1
+        out.append("    </TextBlock>\n")
+    out.append("   </PrintSpace>\n  </Page>\n </Layout>\n</alto>\n")
+    return "".join(out)
+
+def _text_layer_pages(path: str, fmt: str, dpi: int) -> dict:
+    # {page number: result} for every page whose text layer can stand in for OCR
+    results = {}
+    doc = fitz.open(path)
+    try:
+        for n, page in enumerate(doc, start=1):
+            text = page.get_text()
+            if not _needs_ocr(page, text):
+                results[n] = _text_layer_result(page, text, fmt, dpi)
+    finally:
+        doc.close()
+    return results
+
+def _merge_hocr(pages: List[str]) -> bytes:
+    # Tesseract numbers every single-image run as page 1: renumber ids and ppageno, then put
+    # all ocr_page divs under the first document's head
+    body = []
+    for n, page in enumerate(pages, start=1):
+        part = page[page.index("<body>") + len("<body>"):page.rindex("</body>")]
+        part = re.sub(r"""(id=['"][a-z]+_)1(?=['"_])""", rf"\g<1>{n}", part)
+        body.append(part.replace("ppageno 0", f"ppageno {n - 1}"))
+    head = pages[0][:pages[0].index("<body>") + len("<body>")]
+    return (head + "".join(body) + "</body>\n</html>\n").encode("utf-8")
+
+def _merge_alto(pages: List[str]) -> bytes:
+    # One <Page> per input page inside the first document's <Layout>; ids are prefixed per page
+    body = []
+    for n, page in enumerate(pages, start=1):
+        part = page[page.index("<Layout>") + len("<Layout>"):page.rindex("</Layout>")]
+        part = re.sub(r'\bID="([^"]*)"', rf'ID="p{n}_\1"', part)
+        body.append(part.replace('PHYSICAL_IMG_NR="0"', f'PHYSICAL_IMG_NR="{n - 1}"'))
+    first = pages[0]
+    return (first[:first.index("<Layout>") + len("<Layout>")] + "".join(body) + first[first.rindex("</Layout>"):]).encode("utf-8")
+
+def _searchable_pdf(path: str, layers: List[Optional[bytes]]) -> bytes:
+    doc = fitz.open(path)
+    try:
+        for page, layer in zip(doc, layers):
+            if layer is None:
+                continue
+            text_doc = fitz.open("pdf", layer)
+            page.show_pdf_page(page.rect, text_doc, 0, overlay=True)
+            text_doc.close()
+        return pdf_bytes(doc, garbage=3, deflate=True)
+    finally:
+        doc.close()
+
+async def ocr_document(path: str, fmt: str = "text", concurrency: Optional[int] = None, progress=None, hybrid: bool = False) -> bytes:
+    page_count = await run_in_pool("fitz", pdf_page_count, path)
+    results = {}
+    if hybrid:
+        with stage("convert", "fitz"):
+            results = await run_in_pool("assemble", _text_layer_pages, path, fmt, OCR_DPI)
+        if progress:
+            progress(len(results), page_count)
+    todo = [n for n in range(1, page_count + 1) if n not in results]
+    groups = [todo[i:i + max(1, OCR_CHUNK_PAGES)] for i in range(0, len(todo), max(1, OCR_CHUNK_PAGES))]
+    on_done = (lambda i, chunk: progress(len(chunk), page_count)) if progress else None
+    with stage("convert", "tesseract"):
+        chunks = await map_in_pool("render", _ocr_pages, [(path, group, OCR_DPI, fmt) for group in groups], concurrency, on_done)
+    for group, chunk in zip(groups, chunks):
+        results.update(zip(group, chunk))
+    pages = [results[n] for n in range(1, page_count + 1)]
+    if fmt == "text":
+        return JSONResponse({"text": "\n".join(pages)}).body
+    if fmt == "json":
+        return JSONResponse({"dpi": OCR_DPI, "pages": [dict({"source": "ocr"}, page=n, **p) for n, p in enumerate(pages, start=1)]}).body
+    with stage("encode"):
+        if fmt == "hocr":
+            return await run_in_pool("assemble", _merge_hocr, pages)
+        if fmt == "alto":
+            return await run_in_pool("assemble", _merge_alto, pages)
+        return await run_in_pool("assemble", _searchable_pdf, path, pages)
+
+def _ocr_response(data: bytes, fmt: str) -> Response:
+    media_type, filename = OCR_FORMATS[fmt]
+    if media_type == "application/json":
+        return Response(data, media_type=media_type)
+    return bytes_response(data, media_type, filename)
+
+def _ocr_params(fmt: str, mode: str) -> dict:
+    # validates the output options and returns the cache parameters (shared with jobs)
+    if fmt not in OCR_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(OCR_FORMATS)}")
+    if mode not in ("ocr", "hybrid"):
+        raise HTTPException(status_code=400, detail="mode must be ocr or hybrid")
+    params = {"dpi": OCR_DPI}
+    if fmt != "text":
+        params["format"] = fmt
+    if mode != "ocr":
+        params["mode"] = mode
+    return params
+
 @app.post("/tools/ocr")
-async def ocr_pdf(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
-    images = convert_from_path(path, dpi=200)
-    full_text = []
-    for img in images:
-        txt = pytesseract.image_to_string(img)
-        full_text.append(txt)
-    try: os.remove(path)
-    except: pass
-    return JSONResponse({"text": "\n".join(full_text)})
+async def ocr_pdf(file: UploadFile = File(...), concurrency: Optional[int] = Form(None), format: str = Form("text"),
+                  mode: str = Form("ocr")):
+    # mode="hybrid": pages with a usable text layer are extracted directly instead of OCRed
+    fmt = format.lower()
+    params = _ocr_params(fmt, mode)
+    key = ResultCache.make_key("ocr", await run_in_pool("fitz", upload_digest, file), params)
+    media_type, filename = OCR_FORMATS[fmt]
+    hit = await cached_response(key, media_type, None if media_type == "application/json" else filename)
+    if hit:
+        return hit
+    path = await run_in_pool("fitz", save_uploadfile_tmp, file)
+    try:
+        data = await ocr_document(path, fmt, concurrency, hybrid=mode == "hybrid")
+    finally:
+        remove_paths(path)
+    await run_in_pool("fitz", result_cache.put_bytes, key, data)
+    return _ocr_response(data, fmt)
 
 # 21. HTML -> PDF (wkhtmltopdf or weasyprint)
+def _html_to_pdf(html: str, out: str):
+    # use wkhtmltopdf if installed
+    subprocess.run(["wkhtmltopdf", "-", out], input=html.encode("utf-8"), check=False)
+
 @app.post("/convert/html-to-pdf")
 async def html_to_pdf(html: str = Form(...)):
-    out = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    # use wkhtmltopdf if installed
-    p = subprocess.run(["wkhtmltopdf", "-", out], input=html.encode("utf-8"), check=False)
-    if not os.path.exists(out):
+    key = ResultCache.make_key("html-to-pdf", hashlib.sha256(html.encode("utf-8")).hexdigest())
+    hit = await cached_response(key, "application/pdf", "out.pdf")
+    if hit:
+        return hit
+    out = temp_path(".pdf")
+    with stage("convert", "wkhtmltopdf"):
+        await run_in_pool("subprocess", _html_to_pdf, html, out)
+    if not os.path.exists(out) or os.path.getsize(out) == 0:
+        remove_paths(out)
         raise HTTPException(status_code=500, detail="Conversion failed")
-    return StreamingResponse(open(out, "rb"), media_type="application/pdf", headers={"Content-Disposition":"attachment; filename=out.pdf"})
+    await run_in_pool("fitz", result_cache.put_file, key, out)
+    return file_response(out, "application/pdf", "out.pdf")
 
 # Extra tools
-# 22. PDF -> PPT (image-based slides)
-@app.post("/convert/pdf-to-ppt")
-async def pdf_to_ppt(file: UploadFile = File(...)):
+# 22. PDF -> PPT
+# mode="raster": one picture per slide. Pages are rendered and encoded (JPEG by default) in
+# parallel on the render pool and assembled in page order as they arrive.
+# mode="native": the page's own embedded images and text (as editable text boxes) are placed
+# on the slide at their PDF positions; nothing is rasterized, vector drawings are dropped.
+# Slides take the first page's size; pages are scaled to fit and centred.
+PPT_DEFAULTS = {"dpi": 150, "format": "jpeg", "quality": 85, "mode": "raster"}
+PPT_IMAGE_FORMATS = ("jpeg", "png")  # python-pptx cannot embed WebP
+PPTX_NATIVE_IMAGE_EXTS = ("png", "jpeg", "jpg", "bmp", "gif", "tiff")
+
+def _new_presentation(width: float, height: float):
+    # width/height in PDF points; 1pt = 12700 EMU, PowerPoint accepts 1in to 56in
     from pptx import Presentation
-    from pptx.util import Inches
-    path = save_uploadfile_tmp(file)
-    images = convert_from_path(path, dpi=150)
     prs = Presentation()
-    for img in images:
-        slide = prs.slides.add_slide(prs.slide_layouts[6])
-        img_buf = io.BytesIO()
-        img.save(img_buf, format="PNG")
-        img_buf.seek(0)
-        slide.shapes.add_picture(img_buf, Inches(0), Inches(0), width=prs.slide_width, height=prs.slide_height)
-    out_path = tempfile.NamedTemporaryFile(suffix=".pptx", delete=False).name
-    prs.save(out_path)
-    try: os.remove(path)
-    except: pass
-    return StreamingResponse(open(out_path, "rb"), media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                             headers={"Content-Disposition":"attachment; filename=converted.pptx"})
+    emu_w, emu_h = width * 12700, height * 12700
+    scale = min(1.0, 51206400 / max(emu_w, emu_h, 1))
+    scale = max(scale, 914400 / max(min(emu_w, emu_h), 1))
+    prs.slide_width, prs.slide_height = int(emu_w * scale), int(emu_h * scale)
+    return prs
+
+def _slide_transform(rect: fitz.Rect, prs):
+    # (EMU per PDF point, x offset, y offset) placing the page centred on the slide
+    scale = min(prs.slide_width / rect.width, prs.slide_height / rect.height)
+    return scale, (prs.slide_width - rect.width * scale) / 2, (prs.slide_height - rect.height * scale) / 2
+
+def _page_rects(path: str) -> list:
+    doc = fitz.open(path)
+    try:
+        return [page.rect for page in doc]
+    finally:
+        doc.close()
+
+def _add_image_slide(prs, rect: fitz.Rect, data: bytes):
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    scale, x, y = _slide_transform(rect, prs)
+    slide.shapes.add_picture(io.BytesIO(data), int(x), int(y), int(rect.width * scale), int(rect.height * scale))
+
+def _save_presentation(prs, out_path: str):
+    with stage("encode"):
+        prs.save(out_path)
+
+async def _pptx_from_renders(path: str, out_path: str, dpi: int, fmt: str, quality: int, prefetch: Optional[int] = None, progress=None):
+    # Pages are rendered across the render pool and placed on slides in order as they arrive
+    rects = await run_in_pool("assemble", _page_rects, path)
+    prs = _new_presentation(rects[0].width, rects[0].height)
+    pages = iter(rects)
+    images = aiter_in_pool("render", _render_image, [(path, n, dpi, fmt, quality) for n in range(1, len(rects) + 1)], prefetch)
+    async with contextlib.aclosing(images):
+        async for data in images:
+            await run_in_pool("assemble", _add_image_slide, prs, next(pages), data)
+            if progress:
+                progress(1, len(rects))
+    await run_in_pool("assemble", _save_presentation, prs, out_path)
+
+def _native_image(doc: fitz.Document, page: fitz.Page, info: dict) -> bytes:
+    xref = info["xref"]
+    if xref:
+        img = doc.extract_image(xref)
+        if img and img["ext"] in PPTX_NATIVE_IMAGE_EXTS and not img.get("smask"):
+            return img["image"]  # original bytes, no re-encoding
+        pix = fitz.Pixmap(doc, xref)
+        if pix.colorspace and pix.colorspace.n > 3:
+            pix = fitz.Pixmap(fitz.csRGB, pix)
+        if img and img.get("smask"):
+            pix = fitz.Pixmap(pix, fitz.Pixmap(doc, img["smask"]))
+        return pix.tobytes("png")
+    # inline image: no object to extract, so render just its area
+    return page.get_pixmap(dpi=150, clip=fitz.Rect(info["bbox"])).tobytes("png")
+
+def _pdf_to_pptx_native(path: str, out_path: str, progress=None):
+    from pptx.dml.color import RGBColor
+    from pptx.util import Pt
+    doc = fitz.open(path)
+    try:
+        first = doc[0].rect
+        prs = _new_presentation(first.width, first.height)
+        for page in doc:
+            slide = prs.slides.add_slide(prs.slide_layouts[6])
+            scale, ox, oy = _slide_transform(page.rect, prs)
+
+            def box(bbox):
+                x0, y0, x1, y1 = bbox
+                return int(ox + x0 * scale), int(oy + y0 * scale), max(1, int((x1 - x0) * scale)), max(1, int((y1 - y0) * scale))
+
+            for info in page.get_image_info(xrefs=True):
+                if fitz.Rect(info["bbox"]).is_empty:
+                    continue
+                slide.shapes.add_picture(io.BytesIO(_native_image(doc, page, info)), *box(info["bbox"]))
+            for block in page.get_text("dict")["blocks"]:
+                if block["type"] != 0:
+                    continue
+                frame = slide.shapes.add_textbox(*box(block["bbox"])).text_frame
+                frame.margin_left = frame.margin_right = frame.margin_top = frame.margin_bottom = 0
+                frame.word_wrap = False
+                for i, line in enumerate(block["lines"]):
+                    para = frame.paragraphs[0] if i == 0 else frame.add_paragraph()
+                    for span in line["spans"]:
+                        run = para.add_run()
+                        run.text = span["text"]
+                        run.font.size = Pt(max(1.0, span["size"] * scale / 12700))
+                        run.font.bold = bool(span["flags"] & 16)
+                        run.font.italic = bool(span["flags"] & 2)
+                        run.font.color.rgb = RGBColor.from_string(f"{span['color']:06X}")
+            if progress:
+                progress(1, doc.page_count)
+    finally:
+        doc.close()
+    _save_presentation(prs, out_path)
+
+def _ppt_options(options: dict) -> dict:
+    # PPT_DEFAULTS keys, filled in and validated; also the cache parameters, so the endpoint
+    # and jobs agree
+    opts = dict(PPT_DEFAULTS, **options)
+    opts["format"] = str(opts["format"]).lower()
+    if opts["mode"] not in ("raster", "native"):
+        raise HTTPException(status_code=400, detail="mode must be raster or native")
+    if opts["format"] not in PPT_IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be jpeg or png (PowerPoint files cannot carry WebP)")
+    if not 1 <= opts["dpi"] <= 600:
+        raise HTTPException(status_code=400, detail="dpi must be between 1 and 600")
+    if not 1 <= opts["quality"] <= 100:
+        raise HTTPException(status_code=400, detail="quality must be between 1 and 100")
+    return opts
+
+async def convert_pdf_to_pptx(path: str, out_path: str, options: dict, concurrency: Optional[int] = None, progress=None):
+    opts = _ppt_options(options)
+    if await run_in_pool("fitz", pdf_page_count, path) == 0:
+        raise HTTPException(status_code=400, detail="PDF has no pages")
+    with stage("convert", "python-pptx"):
+        if opts["mode"] == "native":
+            await run_in_pool("assemble", _pdf_to_pptx_native, path, out_path, progress)
+        else:
+            await _pptx_from_renders(path, out_path, opts["dpi"], opts["format"], opts["quality"], concurrency, progress)
+
+@app.post("/convert/pdf-to-ppt")
+async def pdf_to_ppt(file: UploadFile = File(...), mode: str = Form("raster"), format: str = Form("jpeg"), quality: int = Form(85),
+                     dpi: int = Form(150), concurrency: Optional[int] = Form(None)):
+    options = _ppt_options({"dpi": dpi, "format": format, "quality": quality, "mode": mode})
+    key = ResultCache.make_key("pdf-to-ppt", await run_in_pool("fitz", upload_digest, file), options)
+    hit = await cached_response(key, "application/vnd.openxmlformats-officedocument.presentationml.presentation", "converted.pptx")
+    if hit:
+        return hit
+    path = await run_in_pool("fitz", save_uploadfile_tmp, file)
+    out_path = temp_path(".pptx")
+    try:
+        await convert_pdf_to_pptx(path, out_path, options, concurrency)
+        await run_in_pool("fitz", result_cache.put_file, key, out_path)
+    except BaseException:
+        remove_paths(out_path)
+        raise
+    finally:
+        remove_paths(path)
+    return file_response(out_path, "application/vnd.openxmlformats-officedocument.presentationml.presentation", "converted.pptx")
 
 # 23. PPT -> PDF (libreoffice)
 @app.post("/convert/ppt-to-pdf")
 async def ppt_to_pdf(file: UploadFile = File(...)):
-    path = save_uploadfile_tmp(file)
-    tmp_dir = tempfile.mkdtemp()
+    return await office_to_pdf_response(file, "impress_pdf_Export")
+
+# --- Background jobs ---
+# POST /jobs/{operation} answers straight away with a job id; conversions run on a local
+# asyncio queue drained by JOB_WORKERS workers. The queue is bounded, so a full queue
+# turns into a fast 503 instead of piling up open connections.
+JOB_WORKERS = _env_int("JOB_WORKERS", 2)
+JOB_QUEUE_SIZE = _env_int("JOB_QUEUE_SIZE", 100)
+JOB_TTL_SECONDS = _env_int("JOB_TTL_SECONDS", 3600)  # finished jobs and their results are dropped after this
+
+class Job:
+    def __init__(self, operation: str, paths: List[str], cache_key: str, options: dict):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.paths = paths  # uploaded inputs; only merge takes more than one
+        self.path = paths[0]
+        self.cache_key = cache_key
+        self.options = options
+        self.status = "queued"  # queued -> running -> done | failed
+        self.pages_done = 0
+        self.pages_total = None
+        self.error = None
+        self.result_path = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def progress(self, pages: int, total: int):
+        self.pages_total = total
+        self.pages_done = min(total, self.pages_done + pages)
+
+    def to_dict(self) -> dict:
+        info = {
+            "job_id": self.id,
+            "operation": self.operation,
+            "status": self.status,
+            "pages_done": self.pages_done,
+            "pages_total": self.pages_total,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "status_url": f"/jobs/{self.id}",
+        }
+        if self.status == "done":
+            info["download_url"] = f"/jobs/{self.id}/download"
+        return info
+
+async def _job_pdf_to_word(job: Job, out_path: str, pages: Optional[str] = None,
+                           parallel: Optional[bool] = None, concurrency: Optional[int] = None):
+    await convert_pdf_to_docx(job.path, out_path, pages, parallel, concurrency, job.progress)
+
+async def _job_pdf_to_excel(job: Job, out_path: str, concurrency: Optional[int] = None, prefilter: bool = True,
+                            format: str = "xlsx"):
+    count = await extract_tables(job.path, out_path, format, concurrency, job.progress, prefilter)
+    if count == 0:
+        raise HTTPException(status_code=404, detail="No tables found")
+
+async def _job_ocr(job: Job, out_path: str, concurrency: Optional[int] = None, format: str = "text", mode: str = "ocr"):
+    data = await ocr_document(job.path, format, concurrency, job.progress, hybrid=mode == "hybrid")
+    with open(out_path, "wb") as f:
+        f.write(data)
+
+async def _job_merge(job: Job, out_path: str, garbage: int = 3, deflate: bool = True):
+    # progress counts input files rather than pages
+    job.progress(0, len(job.paths))
+    await run_in_pool("assemble", merge_pdf_files, job.paths, out_path, garbage, deflate, job.progress)
+
+async def _job_pdf_to_ppt(job: Job, out_path: str, concurrency: Optional[int] = None, **options):
+    await convert_pdf_to_pptx(job.path, out_path, options, concurrency, job.progress)
+
+# Job options are checked at submit time with the sync endpoints' rules and messages. Each
+# operation lists its option fields (with the converters the pipeline uses for JSON values)
+# and a function returning (options for the runner, cache parameters); the parameters come
+# from the same helpers the endpoints use, so a job and a request share cache keys.
+def _word_job_options(opts: dict):
+    return opts, _word_params(opts.get("pages"))
+
+def _excel_job_options(opts: dict):
+    opts["format"] = opts.get("format", "xlsx").lower()
+    return opts, _table_params(opts["format"], opts.get("prefilter", True))
+
+def _ocr_job_options(opts: dict):
+    opts["format"] = opts.get("format", "text").lower()
+    return opts, _ocr_params(opts["format"], opts.get("mode", "ocr"))
+
+def _ppt_job_options(opts: dict):
+    concurrency = opts.pop("concurrency", None)
+    params = _ppt_options(opts)
+    return dict(params, concurrency=concurrency), params
+
+def _merge_job_options(opts: dict):
+    params = _merge_params(opts.get("garbage", 3), opts.get("deflate", True))
+    return params, params
+
+# operation -> runner, media type, download name, option fields, option normalizer
+JOB_OPERATIONS = {
+    "pdf-to-word": (_job_pdf_to_word, "application/vnd.openxmlformats-officedocument.wordprocessingml.document", "converted.docx",
+                    {"pages": _page_list_field, "parallel": _bool_field, "concurrency": _int_field}, _word_job_options),
+    "pdf-to-excel": (_job_pdf_to_excel, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "tables.xlsx",
+                     {"concurrency": _int_field, "prefilter": _bool_field, "format": _text_field}, _excel_job_options),
+    "ocr": (_job_ocr, "application/json", "ocr.json",
+            {"concurrency": _int_field, "format": _text_field, "mode": _text_field}, _ocr_job_options),
+    "pdf-to-ppt": (_job_pdf_to_ppt, "application/vnd.openxmlformats-officedocument.presentationml.presentation", "converted.pptx",
+                   {"concurrency": _int_field, "mode": _text_field, "format": _text_field, "quality": _int_field, "dpi": _int_field},
+                   _ppt_job_options),
+    "merge": (_job_merge, "application/pdf", "merged.pdf", {"garbage": _int_field, "deflate": _bool_field}, _merge_job_options),
+}
+
+# operation -> {options["format"]: (media type, download name)} for operations with several outputs
+JOB_OUTPUT_FORMATS = {"ocr": OCR_FORMATS, "pdf-to-excel": TABLE_FORMATS}
+
+def _job_output(job: Job):
+    _, media_type, filename, _, _ = JOB_OPERATIONS[job.operation]
+    return JOB_OUTPUT_FORMATS.get(job.operation, {}).get(job.options.get("format"), (media_type, filename))
+
+jobs = {}
+_job_queue: Optional[asyncio.Queue] = None
+_job_tasks = []
+
+def _copy_to_file(src, out_path: str):
+    with src, open(out_path, "wb") as f:
+        shutil.copyfileobj(src, f)
+
+def _expire_jobs():
+    cutoff = time.time() - JOB_TTL_SECONDS
+    for job_id, job in list(jobs.items()):
+        if job.finished_at is not None and job.finished_at < cutoff:
+            del jobs[job_id]
+            if job.result_path:
+                remove_paths(job.result_path)
+
+async def _run_job(job: Job):
+    runner = JOB_OPERATIONS[job.operation][0]
+    out_path = temp_path(os.path.splitext(_job_output(job)[1])[1])
+    _current_route.set(f"job:{job.operation}")
+    job.status = "running"
     try:
-        subprocess.run(["libreoffice", "--headless", "--convert-to", "pdf", "--outdir", tmp_dir, path], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        base = os.path.splitext(os.path.basename(path))[0] + ".pdf"
-        pdf_path = os.path.join(tmp_dir, base)
-        if not os.path.exists(pdf_path):
-            raise HTTPException(status_code=500, detail="Conversion failed")
-        return StreamingResponse(open(pdf_path, "rb"), media_type="application/pdf",
-                                 headers={"Content-Disposition": f"attachment; filename={base}"})
+        cached = await run_in_pool("fitz", result_cache.open, job.cache_key)
+        if cached:
+            await run_in_pool("fitz", _copy_to_file, cached, out_path)
+        else:
+            await runner(job, out_path, **job.options)
+            await run_in_pool("fitz", result_cache.put_file, job.cache_key, out_path)
+        if job.pages_total is not None:
+            job.pages_done = job.pages_total
+        job.result_path = out_path
+        job.status = "done"
+    except Exception as e:
+        job.status = "failed"
+        job.error = e.detail if isinstance(e, HTTPException) else (str(e) or type(e).__name__)
+        remove_paths(out_path)
     finally:
-        try: os.remove(path)
-        except: pass
+        job.finished_at = time.time()
+        remove_paths(*job.paths)
+
+async def _job_worker():
+    while True:
+        job = await _job_queue.get()
+        try:
+            await _run_job(job)
+        finally:
+            _job_queue.task_done()
+            _expire_jobs()
+
+@app.on_event("startup")
+async def start_job_workers():
+    global _job_queue
+    _job_queue = asyncio.Queue(maxsize=max(1, JOB_QUEUE_SIZE))
+    for _ in range(max(1, JOB_WORKERS)):
+        _job_tasks.append(asyncio.create_task(_job_worker()))
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    for task in _job_tasks:
+        task.cancel()
+    _job_tasks.clear()
+
+@app.post("/jobs/{operation}", status_code=202)
+async def submit_job(operation: str, file: Optional[UploadFile] = File(None), files: Optional[List[UploadFile]] = File(None),
+                     options: Optional[str] = Form(None)):
+    # options: JSON object of extra parameters for the operation, e.g. {"concurrency": 2} for ocr.
+    # merge takes its inputs as repeated "files" fields; every other operation takes one "file".
+    if operation not in JOB_OPERATIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown operation: {operation}")
+    uploads = ([file] if file else []) + (files or [])
+    if not uploads:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    if len(uploads) > 1 and operation != "merge":
+        raise HTTPException(status_code=400, detail=f"{operation} takes a single file")
+    try:
+        opts = json.loads(options) if options else {}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="options must be a JSON object")
+    if not isinstance(opts, dict):
+        raise HTTPException(status_code=400, detail="options must be a JSON object")
+    _, _, _, fields, normalize = JOB_OPERATIONS[operation]
+    unknown = sorted(set(opts) - set(fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown option(s) for {operation}: {', '.join(unknown)}")
+    values = {}
+    for field, value in opts.items():
+        if value is None:
+            continue
+        try:
+            values[field] = fields[field](value)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"{field}: {e}")
+    opts, cache_params = normalize(values)
+    if _job_queue is None:
+        raise HTTPException(status_code=503, detail="Job queue is not running")
+    if _job_queue.full():
+        raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "30"})
+    _expire_jobs()
+    digests = [await run_in_pool("fitz", upload_digest, f) for f in uploads]
+    digest = digests[0] if len(digests) == 1 else hashlib.sha256("".join(digests).encode()).hexdigest()
+    key = ResultCache.make_key(operation, digest, cache_params)
+    paths = []
+    try:
+        for f in uploads:
+            paths.append(await run_in_pool("fitz", save_uploadfile_tmp, f))
+        job = Job(operation, paths, key, opts)
+        _job_queue.put_nowait(job)
+    except BaseException as e:
+        remove_paths(*paths)
+        if isinstance(e, asyncio.QueueFull):
+            raise HTTPException(status_code=503, detail="Job queue is full", headers={"Retry-After": "30"})
+        raise
+    jobs[job.id] = job
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/download")
+async def job_download(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail="Job is not finished yet")
+    media_type, filename = _job_output(job)
+    # no cleanup here: the result stays downloadable until the job expires
+    return FileResponse(job.result_path, media_type=media_type, headers=attachment(filename))
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    cache = result_cache.stats()
+    gauges = {
+        "pdf_tools_cache_bytes": cache["disk_bytes"],
+        "pdf_tools_jobs_queued": _job_queue.qsize() if _job_queue is not None else 0,
+    }
+    for name, gate in admission_gates.items():
+        gauges[f"pdf_tools_{name}_active"] = gate.active
+        gauges[f"pdf_tools_{name}_waiting"] = gate.waiting
+    return Response(metrics.render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return result_cache.stats()
 
 # simple root
 @app.get("/")
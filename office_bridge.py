@@ -0,0 +1,62 @@
+# office_bridge.py
+# UNO side of the LibreOffice worker pool in main.py. main.py imports it directly when the
+# app's own Python can load the UNO bindings. Otherwise (the python:3.11 image cannot load
+# Debian's python3-uno) each worker runs this file under an interpreter that can, usually
+# /usr/bin/python3, as a long-lived bridge to its listening soffice:
+#
+#     python3 office_bridge.py <pipe name> <connect timeout>
+#
+# The bridge prints {"ready": true} once connected, then reads one JSON request per line
+# ({"path", "pdf_path", "filter"}) and answers each with {"ok": true} or {"error": "..."}.
+import json
+import sys
+import time
+
+import uno
+from com.sun.star.connection import NoConnectException
+
+def _prop(name, value):
+    prop = uno.createUnoStruct("com.sun.star.beans.PropertyValue")
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+def connect(pipe_name: str, timeout: float):
+    # Desktop of the soffice listening on the named pipe, retrying while it starts up
+    local = uno.getComponentContext()
+    resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            ctx = resolver.resolve(f"uno:pipe,name={pipe_name};urp;StarOffice.ComponentContext")
+            break
+        except NoConnectException:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+    return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+
+def convert(desktop, path: str, pdf_path: str, filter_name: str):
+    doc = desktop.loadComponentFromURL(uno.systemPathToFileUrl(path), "_blank", 0, (_prop("Hidden", True),))
+    if doc is None:
+        raise RuntimeError("LibreOffice could not open the document")
+    try:
+        doc.storeToURL(uno.systemPathToFileUrl(pdf_path), (_prop("FilterName", filter_name),))
+    finally:
+        doc.close(True)
+
+def main():
+    pipe_name, timeout = sys.argv[1], float(sys.argv[2])
+    desktop = connect(pipe_name, timeout)
+    print(json.dumps({"ready": True}), flush=True)
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            convert(desktop, request["path"], request["pdf_path"], request["filter"])
+            reply = {"ok": True}
+        except Exception as e:
+            reply = {"error": str(e) or type(e).__name__}
+        print(json.dumps(reply), flush=True)
+
+if __name__ == "__main__":
+    main()